@@ -1,10 +1,12 @@
 # app/agents/analyzer.py
-from typing import List
+from typing import Callable, List, Optional
 from openai import OpenAI
 
 from ..config import OPENAI_API_KEY
 from ..utils.logging_utils import setup_logging
-from ..models import get_unanalysed_documents, update_document_analysis
+from ..models import requeue_stages, update_document_analysis
+from .stages import process_stage
+from .summarizer import MapReduceSummarizer
 
 logger = setup_logging()
 
@@ -26,47 +28,47 @@ class KeywordAnalysisAgent:
         if not OPENAI_API_KEY:
             logger.warning("[KeywordAnalysisAgent] OPENAI_API_KEY is not set!")
         self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.summarizer = MapReduceSummarizer(self.client)
         self.keywords = DEFAULT_KEYWORDS + (extra_keywords or [])
 
-    def analyze(self, text: str) -> tuple[str, List[str]]:
-        keywords_str = ", ".join(self.keywords)
-        prompt = f"""
-You are a regulatory expert. Analyze the following translated regulatory document.
-
-1. Provide a concise summary (max 10 lines).
-2. Identify which of these keywords are clearly relevant in the document (keep the same keywords): {keywords_str}.
-3. Do NOT hallucinate; only select a keyword if the topic is actually present.
-
-Return JSON with (IN HERE WHEN RETURNING RESULTS TRANSLATE SUMMARY AND ONLY SUMMARY TO THE TEXT LANGUAGE, SO MATCHED KEYWORDS AND SUMMARY WONT BE IN THE SAME LANGUAGE IF THE ORIGINAL TEXT IS IN A DIFFERENT LANGUAGE):
-- "summary": string
-- "matched_keywords": list of strings
-"""
-        logger.info("[KeywordAnalysisAgent] Calling OpenAI for analysis...")
-        resp = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You output only valid JSON."},
-                {"role": "user", "content": prompt + "\n\nDocument:\n" + text[:12000]},
-            ],
-            temperature=0.1,
+    def analyze(
+        self, text: str, changes_only: bool = False, on_progress: Optional[Callable] = None
+    ) -> tuple[str, List[str]]:
+        logger.info("[KeywordAnalysisAgent] Calling OpenAI for map-reduce analysis...")
+        summary, matched = self.summarizer.summarize(
+            text, self.keywords, changes_only=changes_only, on_progress=on_progress
         )
-        content = resp.choices[0].message.content
-        # simple eval - in a real system you'd use json.loads and validation
-        import json
-        data = json.loads(content)
-        summary = data.get("summary", "")
-        matched_keywords = data.get("matched_keywords", [])
+        # Only keep keywords we actually asked about
+        known = {k.lower(): k for k in self.keywords}
+        matched_keywords = [known[m.lower()] for m in matched if isinstance(m, str) and m.lower() in known]
         return summary, matched_keywords
 
-    def run(self):
-        docs = get_unanalysed_documents()
-        logger.info(f"[KeywordAnalysisAgent] Documents to analyse: {len(docs)}")
-        for doc in docs:
-            text = doc["translated_text"]
-            if not text:
-                logger.warning(f"[KeywordAnalysisAgent] No translated_text for id={doc['id']}, skipping")
-                continue
-            summary, matched = self.analyze(text)
-            update_document_analysis(doc["id"], summary, matched)
-            logger.info(f"[KeywordAnalysisAgent] Analysed document id={doc['id']} with keywords: {matched}")
-            
\ No newline at end of file
+    def process_document(self, doc, lease=None):
+        if doc["analysis_summary"] is not None:
+            return  # already analysed by an earlier (interrupted) run
+        text = doc["translated_text"]
+        if not text:
+            logger.warning(f"[KeywordAnalysisAgent] No translated_text for id={doc['id']}, skipping")
+            return
+        summary, matched = self.analyze(
+            text,
+            changes_only=bool(doc["diff_text"]),
+            on_progress=lease.renew if lease else None,
+        )
+        update_document_analysis(doc["id"], summary, matched)
+        logger.info(f"[KeywordAnalysisAgent] Analysed document id={doc['id']} with keywords: {matched}")
+
+    def run(self, worker_id: Optional[str] = None, batch_size: int = 10) -> dict:
+        stats = process_stage("analyse", self.process_document, worker_id, batch_size)
+        logger.info(f"[KeywordAnalysisAgent] Run finished: {stats}")
+        return stats
+
+    def reanalyse(self, doc_ids: Optional[List[int]] = None) -> dict:
+        """
+        Analyse already analysed documents again with this agent's keywords.
+        Chunk summaries come from the cache, so only the reduce call is paid
+        for again; documents already notified are not emailed twice.
+        """
+        requeued = requeue_stages("analyse", ("done",), doc_ids)
+        logger.info(f"[KeywordAnalysisAgent] Re-analysing {requeued} document(s)")
+        return self.run()
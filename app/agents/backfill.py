@@ -0,0 +1,166 @@
+# app/agents/backfill.py
+import hashlib
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import unquote, urlparse
+
+import requests
+
+from ..config import DOCS_DIR
+from ..models import enqueue_ready_stages, get_document_hashes, insert_documents, link_document_versions
+from ..utils.logging_utils import setup_logging
+from ..utils.version_utils import version_sort_key
+from .extractor import ExtractionAgent
+
+logger = setup_logging()
+
+INSERT_BATCH_SIZE = 5000
+HASH_PREFIX_RE = re.compile(r"^[0-9a-f]{64}_")
+
+class BackfillAgent(ExtractionAgent):
+    """
+    Bulk import of a historical archive for one authority, from a local
+    directory of PDFs or from a URL manifest.
+
+    Files are hashed (and downloaded) in parallel and deduplicated against
+    one in-memory set of the authority's existing hashes. New rows are
+    inserted with executemany in large transactions, oldest edition first,
+    and their parse stage is queued with a single statement.
+    """
+
+    def __init__(self, authority_code: str, max_workers: int = 8):
+        super().__init__(authority_code)
+        self.max_workers = max_workers
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    def hash_file(self, path: Path) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def _claim_hash(self, content_hash: str) -> bool:
+        """True if this hash is new, both in the database and in this import."""
+        with self._lock:
+            if content_hash in self._seen:
+                return False
+            self._seen.add(content_hash)
+            return True
+
+    def _release_hash(self, content_hash: str):
+        """Forget a claimed hash whose file could not be stored, so a copy of it can still be imported."""
+        with self._lock:
+            self._seen.discard(content_hash)
+
+    def _import_local(self, path: Path) -> Optional[dict]:
+        try:
+            content_hash = self.hash_file(path)
+        except OSError as e:
+            logger.error(f"[{self.code}] Backfill failed for {path}: {e}")
+            return None
+        if not self._claim_hash(content_hash):
+            return None
+        # Archives saved by this tool are named "<hash>_<title>.pdf"
+        title = HASH_PREFIX_RE.sub("", path.stem)
+        target = DOCS_DIR / self.code / self.build_filename(content_hash, title)
+        try:
+            if not target.exists():
+                shutil.copyfile(path, target)
+        except OSError as e:
+            self._release_hash(content_hash)
+            target.unlink(missing_ok=True)
+            logger.error(f"[{self.code}] Backfill failed for {path}: {e}")
+            return None
+        return {
+            "authority": self.code,
+            "title": title,
+            "url": path.resolve().as_uri(),
+            "file_path": str(target),
+            "content_hash": content_hash,
+            **self.identify(target),
+        }
+
+    def _import_remote(self, entry: dict) -> Optional[dict]:
+        try:
+            file_bytes = self.get_file_bytes(entry["url"])
+        except requests.RequestException as e:
+            logger.error(f"[{self.code}] Backfill download failed: {entry['url']} ({e})")
+            return None
+        content_hash = self.compute_hash(file_bytes)
+        if not self._claim_hash(content_hash):
+            return None
+        try:
+            pdf_path = self.save_file(file_bytes, self.build_filename(content_hash, entry["title"]))
+        except OSError as e:
+            self._release_hash(content_hash)
+            logger.error(f"[{self.code}] Backfill could not save {entry['url']}: {e}")
+            return None
+        return {
+            "authority": self.code,
+            "title": entry["title"],
+            "url": entry["url"],
+            "file_path": str(pdf_path),
+            "content_hash": content_hash,
+            **self.identify(pdf_path),
+        }
+
+    @staticmethod
+    def read_manifest(manifest: Path) -> List[dict]:
+        """One URL per line, optionally followed by a tab and a title. '#' starts a comment."""
+        entries = []
+        for line in manifest.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            url, _, title = line.partition("\t")
+            url = url.strip()
+            title = title.strip() or unquote(urlparse(url).path.rsplit("/", 1)[-1]).removesuffix(".pdf")
+            entries.append({"url": url, "title": title})
+        return entries
+
+    def _ingest(self, worker, items: list) -> int:
+        started = time.monotonic()
+        self._seen = get_document_hashes(self.code)
+        (DOCS_DIR / self.code).mkdir(parents=True, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            rows = [r for r in pool.map(worker, items) if r]
+        # Ids follow edition order (version, then publication date), not the
+        # order files happen to be listed in; ties keep the listing order
+        rows = [
+            r for _, r in sorted(
+                enumerate(rows),
+                key=lambda item: version_sort_key(item[1]["version_label"], item[1]["published"], item[0]),
+            )
+        ]
+
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            insert_documents(rows[i:i + INSERT_BATCH_SIZE])
+        if rows:
+            self.identify_documents()
+            link_document_versions(self.code)
+            queued = enqueue_ready_stages("parse")
+            logger.info(f"[{self.code}] Backfill queued {queued} document(s) for parsing")
+
+        logger.info(
+            f"[{self.code}] Backfill: {len(items)} file(s) seen, {len(rows)} new, "
+            f"{len(items) - len(rows)} duplicate or failed, {time.monotonic() - started:.1f}s"
+        )
+        return len(rows)
+
+    def ingest_directory(self, directory: Path) -> int:
+        paths = sorted(p for p in Path(directory).rglob("*") if p.is_file() and p.suffix.lower() == ".pdf")
+        logger.info(f"[{self.code}] Backfill from directory {directory}: {len(paths)} PDF(s)")
+        return self._ingest(self._import_local, paths)
+
+    def ingest_manifest(self, manifest: Path) -> int:
+        entries = self.read_manifest(Path(manifest))
+        logger.info(f"[{self.code}] Backfill from manifest {manifest}: {len(entries)} URL(s)")
+        return self._ingest(self._import_remote, entries)
@@ -7,7 +7,15 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
 from ..config import DOCS_DIR, AUTHORITIES
-from ..models import get_document_by_hash, insert_document
+from ..models import (
+    get_document_by_hash,
+    get_unidentified_documents,
+    insert_document,
+    link_document_versions,
+    update_document_identities,
+)
+from ..utils.pdf_utils import read_first_page
+from ..utils.version_utils import parse_heading, parse_published, parse_version
 from ..utils.logging_utils import setup_logging
 
 logger = setup_logging()
@@ -54,6 +62,10 @@ class ExtractionAgent:
     def compute_hash(self, file_bytes: bytes) -> str:
         return hashlib.sha256(file_bytes).hexdigest()
 
+    def build_filename(self, content_hash: str, title: str) -> str:
+        clean_title = "".join(c if c.isalnum() or c in "._- " else "_" for c in title)[:60]
+        return f"{content_hash}_{clean_title}.pdf"
+
     def save_file(self, file_bytes: bytes, filename: str) -> Path:
         folder = DOCS_DIR / self.code
         folder.mkdir(parents=True, exist_ok=True)
@@ -61,6 +73,32 @@ class ExtractionAgent:
         path.write_bytes(file_bytes)
         return path
 
+    def identify(self, pdf_path: Path) -> dict:
+        """Heading, version and publication date read from the first page."""
+        first_page = ""
+        try:
+            if Path(pdf_path).exists():
+                first_page = read_first_page(Path(pdf_path))
+        except Exception as e:
+            logger.warning(f"[{self.code}] Could not read first page of {pdf_path}: {e}")
+        return {
+            "heading": parse_heading(first_page),
+            "version_label": parse_version(first_page),
+            "published": parse_published(first_page),
+        }
+
+    def identify_documents(self) -> int:
+        """
+        Read heading, version and publication date from the first page of
+        new documents, so editions can be told apart and ordered.
+        """
+        identities = []
+        for doc in get_unidentified_documents(self.code):
+            identity = self.identify(doc["file_path"])
+            identities.append({"id": doc["id"], "title": doc["title"], **identity})
+        update_document_identities(identities)
+        return len(identities)
+
     # -----------------------------------------------------------
     # ✅ FINAL FIXED PIPELINE — IDENTITY BASED ON HASH (perfect)
     # -----------------------------------------------------------
@@ -72,8 +110,12 @@ class ExtractionAgent:
             url = item["url"]
             title = item["title"]
 
-            # Step 1 — Download file into memory
-            file_bytes = self.get_file_bytes(url)
+            # Step 1 — Download file into memory (one bad link must not stop the run)
+            try:
+                file_bytes = self.get_file_bytes(url)
+            except requests.RequestException as e:
+                logger.error(f"[{self.code}] Download failed, will retry next run: {url} ({e})")
+                continue
 
             # Step 2 — Compute hash before saving
             content_hash = self.compute_hash(file_bytes)
@@ -85,9 +127,7 @@ class ExtractionAgent:
                 continue
 
             # Step 4 — Save file using HASH-BASED filename
-            clean_title = "".join(c if c.isalnum() or c in "._- " else "_" for c in title)[:60]
-            filename = f"{content_hash}_{clean_title}.pdf"
-            pdf_path = self.save_file(file_bytes, filename)
+            pdf_path = self.save_file(file_bytes, self.build_filename(content_hash, title))
 
             # Step 5 — Insert into DB
             insert_document(
@@ -101,5 +141,11 @@ class ExtractionAgent:
             logger.info(f"[{self.code}] NEW document added: {pdf_path}")
             new_count += 1
 
+        # Also picks up rows left unlinked by an interrupted run; until then
+        # they are not ready for parsing
+        self.identify_documents()
+        linked = link_document_versions(self.code)
+        logger.info(f"[{self.code}] Linked {linked} document(s) to a previous version")
+
         logger.info(f"[{self.code}] Total NEW documents this run: {new_count}")
         return new_count
\ No newline at end of file
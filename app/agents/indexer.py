@@ -0,0 +1,68 @@
+# app/agents/indexer.py
+from typing import Dict, List, Optional
+
+from ..utils.logging_utils import setup_logging
+from ..utils.keyword_index import (
+    build_postings,
+    count_phrase_hits,
+    decode_positions,
+    encode_positions,
+    tokenize,
+)
+from ..models import (
+    get_index_keywords,
+    get_term_postings,
+    get_unindexed_documents,
+    replace_index_keywords,
+    save_document_postings,
+)
+
+logger = setup_logging()
+
+class KeywordIndexAgent:
+    """
+    Maintains a term-position inverted index over translated_text so any
+    keyword set can be evaluated across the archive without LLM calls.
+    """
+
+    def index_document(self, doc_id: int, text: str):
+        postings = build_postings(text)
+        save_document_postings(
+            doc_id, {term: encode_positions(pos) for term, pos in postings.items()}
+        )
+
+    def run(self) -> int:
+        docs = get_unindexed_documents()
+        logger.info(f"[KeywordIndexAgent] Documents to index: {len(docs)}")
+        for doc in docs:
+            self.index_document(doc["id"], doc["translated_text"])
+        return len(docs)
+
+    def search(self, keywords: List[str]) -> Dict[str, Dict[int, int]]:
+        """Return {keyword: {doc_id: hits}} for every keyword, from the index only."""
+        phrases = {kw: tokenize(kw) for kw in keywords}
+        terms = sorted({t for tokens in phrases.values() for t in tokens})
+        postings = {
+            term: {doc_id: decode_positions(raw) for doc_id, raw in per_doc.items()}
+            for term, per_doc in get_term_postings(terms).items()
+        }
+        return {kw: count_phrase_hits(tokens, postings) for kw, tokens in phrases.items()}
+
+    def evaluate(self, keywords: Optional[List[str]] = None) -> Dict[str, Dict[int, int]]:
+        """
+        Index anything new, evaluate keywords on the whole archive and store the hits.
+        Without keywords, the keyword set of the last evaluation is refreshed,
+        so newly translated documents are matched against the same set.
+        """
+        if keywords is None:
+            keywords = get_index_keywords()
+            if keywords is None:
+                return {}
+        self.run()
+        hits = self.search(keywords)
+        replace_index_keywords(hits)
+        logger.info(
+            f"[KeywordIndexAgent] Evaluated {len(keywords)} keyword(s): "
+            f"{sum(len(v) for v in hits.values())} document match(es)"
+        )
+        return hits
@@ -1,5 +1,6 @@
 # app/agents/notifier.py
 import smtplib
+from typing import Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -12,7 +13,8 @@ from ..config import (
     EMAIL_TO,
 )
 from ..utils.logging_utils import setup_logging
-from ..models import get_unnotified_documents, mark_document_notified
+from ..models import mark_document_notified, set_notification_sending
+from .stages import process_stage
 
 logger = setup_logging()
 
@@ -52,13 +54,27 @@ RegulAI Watcher
             server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
             server.send_message(msg)
 
-    def run(self):
-        docs = get_unnotified_documents()
-        logger.info(f"[NotificationAgent] Documents to notify: {len(docs)}")
-        for doc in docs:
-            subject = f"[RegulAI] New regulatory update from {doc['authority']}"
-            body = self.build_email_body(doc)
+    def process_document(self, doc, lease=None):
+        if doc["last_notified_at"] is not None:
+            return  # never email the same document twice
+        if doc["notify_started_at"] is not None:
+            # A worker stopped between sending and recording the email: it may
+            # have gone out. Leave the decision to an operator (requeue to resend)
+            raise RuntimeError(
+                f"an earlier attempt was interrupted while sending (started {doc['notify_started_at']})"
+            )
+        subject = f"[RegulAI] New regulatory update from {doc['authority']}"
+        body = self.build_email_body(doc)
+        set_notification_sending(doc["id"], True)
+        try:
             self.send_email(subject, body)
-            mark_document_notified(doc["id"])
-            logger.info(f"[NotificationAgent] Notification sent for id={doc['id']}")
-            
\ No newline at end of file
+        except Exception:
+            set_notification_sending(doc["id"], False)  # not sent: safe to retry
+            raise
+        mark_document_notified(doc["id"])
+        logger.info(f"[NotificationAgent] Notification sent for id={doc['id']}")
+
+    def run(self, worker_id: Optional[str] = None, batch_size: int = 10) -> dict:
+        stats = process_stage("notify", self.process_document, worker_id, batch_size)
+        logger.info(f"[NotificationAgent] Run finished: {stats}")
+        return stats
@@ -0,0 +1,71 @@
+# app/agents/parser.py
+from pathlib import Path
+from typing import Optional
+
+from ..config import CHUNK_MAX_CHARS
+from ..utils.logging_utils import setup_logging
+from ..utils.pdf_utils import iter_pdf_pages
+from ..utils.text_utils import CHUNK_SEPARATOR, iter_chunks
+from ..utils.diff_utils import diff_pages, render_changes
+from .stages import process_stage
+from ..models import (
+    get_document,
+    update_document_analysis,
+    update_document_source,
+    update_document_translation,
+)
+
+logger = setup_logging()
+
+class ParsingAgent:
+    """
+    CPU-bound stage: extracts the PDF text (or, for a new edition, only the
+    sections that changed) into documents.source_text for translation.
+    """
+
+    def changed_text(self, doc) -> Optional[str]:
+        """
+        If the document is a new edition of an earlier one, return only the
+        sections that changed. Returns None when there is no usable previous version.
+        """
+        if not doc["previous_version_id"]:
+            return None
+        previous = get_document(doc["previous_version_id"])
+        if previous is None or not Path(previous["file_path"]).exists():
+            return None
+
+        sections = diff_pages(
+            iter_pdf_pages(Path(previous["file_path"])),
+            iter_pdf_pages(Path(doc["file_path"])),
+        )
+        logger.info(
+            f"[ParsingAgent] Document id={doc['id']} vs previous id={previous['id']}: "
+            f"{len(sections)} changed section(s)"
+        )
+        return render_changes(sections)
+
+    def process_document(self, doc, lease=None):
+        if doc["source_text"] is not None or doc["translated_text"] is not None:
+            return  # already parsed by an earlier (interrupted) run
+
+        diff_text = self.changed_text(doc)
+        if diff_text is None:
+            # Pages go through the chunker as they are parsed; the chunks are
+            # stored page-aligned so the translator reuses them as they are
+            chunks = iter_chunks(iter_pdf_pages(Path(doc["file_path"])), CHUNK_MAX_CHARS)
+            update_document_source(doc["id"], CHUNK_SEPARATOR.join(chunks))
+        elif diff_text:
+            update_document_source(doc["id"], diff_text, diff_text)
+        else:
+            # Same text as the previous edition: nothing to translate or analyse
+            update_document_source(doc["id"], "", "")
+            update_document_translation(doc["id"], "")
+            update_document_analysis(doc["id"], "No textual changes compared to the previous version.", [])
+            logger.info(f"[ParsingAgent] No textual changes for id={doc['id']}")
+            return
+        logger.info(f"[ParsingAgent] Parsed document id={doc['id']}")
+
+    def run(self, worker_id: Optional[str] = None, batch_size: int = 10) -> dict:
+        stats = process_stage("parse", self.process_document, worker_id, batch_size)
+        logger.info(f"[ParsingAgent] Run finished: {stats}")
+        return stats
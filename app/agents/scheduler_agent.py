@@ -4,8 +4,10 @@ import schedule
 
 from ..utils.logging_utils import setup_logging
 from .extractor import ExtractionAgent
+from .parser import ParsingAgent
 from .translator import TranslationAgent
-from .analyzer import KeywordAnalysisAgent
+from .analyzer import KeywordAnalysisAgent, DEFAULT_KEYWORDS
+from .indexer import KeywordIndexAgent
 from .notifier import NotificationAgent
 
 logger = setup_logging()
@@ -24,8 +26,13 @@ def run_full_pipeline(authority_codes=None, target_language="en", extra_keywords
         if progress_callback:
             progress_callback("extract_start", {"authority": code})
 
-        e_agent = ExtractionAgent(code)
-        new_count = e_agent.run()
+        try:
+            e_agent = ExtractionAgent(code)
+            new_count = e_agent.run()
+        except Exception:
+            # Other authorities and already-queued documents still go through
+            logger.exception(f"[SchedulerAgent] Extraction failed for {code}")
+            new_count = 0
 
         summary["authorities"][code] = new_count
         summary["new_documents"] += new_count
@@ -33,7 +40,17 @@ def run_full_pipeline(authority_codes=None, target_language="en", extra_keywords
         if progress_callback:
             progress_callback("extract_done", {"authority": code, "new": new_count})
 
-    # 2. Translation
+    # 2. Parsing
+    if progress_callback:
+        progress_callback("parse_start")
+
+    p_agent = ParsingAgent()
+    p_agent.run()
+
+    if progress_callback:
+        progress_callback("parse_done")
+
+    # 3. Translation
     if progress_callback:
         progress_callback("translate_start")
 
@@ -43,7 +60,17 @@ def run_full_pipeline(authority_codes=None, target_language="en", extra_keywords
     if progress_callback:
         progress_callback("translate_done")
 
-    # 3. Analysis
+    # 4. Keyword index (no LLM calls: current keyword set over the whole archive)
+    if progress_callback:
+        progress_callback("index_start")
+
+    i_agent = KeywordIndexAgent()
+    i_agent.evaluate(DEFAULT_KEYWORDS + (extra_keywords or []))
+
+    if progress_callback:
+        progress_callback("index_done")
+
+    # 5. Analysis
     if progress_callback:
         progress_callback("analysis_start")
 
@@ -53,7 +80,7 @@ def run_full_pipeline(authority_codes=None, target_language="en", extra_keywords
     if progress_callback:
         progress_callback("analysis_done")
 
-    # 4. Notifications
+    # 6. Notifications
     if progress_callback:
         progress_callback("notify_start")
 
@@ -0,0 +1,84 @@
+# app/agents/stages.py
+import os
+import socket
+from typing import Callable, Optional
+
+from ..config import PIPELINE_MAX_ATTEMPTS, PIPELINE_BACKOFF_SECONDS, PIPELINE_LEASE_SECONDS
+from ..models import (
+    claim_stage_documents,
+    complete_stage,
+    enqueue_ready_stages,
+    fail_stage,
+    renew_lease,
+)
+from ..utils.logging_utils import setup_logging
+
+logger = setup_logging()
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LeaseLost(Exception):
+    """Another worker took over the document; stop paying for work on it."""
+
+class Lease:
+    """Handle on a leased (document, stage) row, passed to stage handlers."""
+
+    def __init__(self, doc_id: int, stage: str, worker_id: str):
+        self.doc_id = doc_id
+        self.stage = stage
+        self.worker_id = worker_id
+
+    def renew(self):
+        """Extend the lease; handlers call this between chunks of long work."""
+        if not renew_lease(self.doc_id, self.stage, self.worker_id, PIPELINE_LEASE_SECONDS):
+            raise LeaseLost(f"lease on document id={self.doc_id} ({self.stage}) was lost")
+
+def process_stage(
+    stage: str,
+    handler: Callable,
+    worker_id: Optional[str] = None,
+    batch_size: int = 10,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    Run `handler(doc, lease)` for every document ready for `stage`.
+
+    Documents are leased before processing, so parallel workers never pick
+    the same row; handlers renew the lease while they make progress. A
+    failing document is retried later with exponential backoff and
+    dead-lettered after PIPELINE_MAX_ATTEMPTS; it never blocks the rest of
+    the queue. Returns counts per outcome.
+    """
+    worker_id = worker_id or default_worker_id()
+    enqueue_ready_stages(stage)
+
+    stats = {"done": 0, "failed": 0, "dead": 0}
+    while limit is None or stats["done"] + stats["failed"] + stats["dead"] < limit:
+        claim = batch_size if limit is None else min(batch_size, limit - sum(stats.values()))
+        docs = claim_stage_documents(stage, worker_id, claim, PIPELINE_LEASE_SECONDS, PIPELINE_MAX_ATTEMPTS)
+        if not docs:
+            break
+        for doc in docs:
+            lease = Lease(doc["id"], stage, worker_id)
+            try:
+                # The lease clock started at claim time, not when this document's turn came
+                lease.renew()
+                handler(doc, lease)
+            except LeaseLost:
+                logger.warning(f"[{stage}] Lease lost for document id={doc['id']}, leaving it to its new owner")
+                continue
+            except Exception as e:
+                status = fail_stage(
+                    doc["id"], stage, worker_id, f"{type(e).__name__}: {e}",
+                    PIPELINE_MAX_ATTEMPTS, PIPELINE_BACKOFF_SECONDS,
+                )
+                logger.exception(f"[{stage}] Document id={doc['id']} failed ({status})")
+                if status in stats:
+                    stats[status] += 1
+                continue
+            if complete_stage(doc["id"], stage, worker_id):
+                stats["done"] += 1
+            else:
+                logger.warning(f"[{stage}] Lease lost for document id={doc['id']}")
+    return stats
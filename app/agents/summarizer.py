@@ -0,0 +1,151 @@
+# app/agents/summarizer.py
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from ..config import OPENAI_MODEL, CHUNK_MAX_CHARS, REDUCE_MAX_CHARS, LLM_MAX_WORKERS
+from ..models import get_chunk_summaries, save_chunk_summary
+from ..utils.logging_utils import setup_logging
+from ..utils.text_utils import chunk_text, text_hash
+
+logger = setup_logging()
+
+MAP_PROMPT = """
+You are a regulatory expert. Summarize the following excerpt of a translated regulatory document.
+
+1. Provide a concise summary of the excerpt (max 5 lines).
+2. List the regulatory topics the excerpt actually covers (short noun phrases, max 15).
+3. Do NOT hallucinate; only mention what is present in the excerpt.
+
+Return JSON with:
+- "summary": string
+- "topics": list of strings
+"""
+
+REDUCE_PROMPT = """
+You are a regulatory expert. Below are partial summaries and topics covering consecutive parts of one translated regulatory document.
+{scope}
+1. Merge them into a concise summary of the whole document (max 10 lines).
+2. Identify which of these keywords are clearly relevant in the document (keep the same keywords): {keywords}.
+3. Do NOT hallucinate; only select a keyword if the topic is actually present in the partial summaries or topics.
+
+Return JSON with (IN HERE WHEN RETURNING RESULTS TRANSLATE SUMMARY AND ONLY SUMMARY TO THE TEXT LANGUAGE, SO MATCHED KEYWORDS AND SUMMARY WONT BE IN THE SAME LANGUAGE IF THE ORIGINAL TEXT IS IN A DIFFERENT LANGUAGE):
+- "summary": string
+- "matched_keywords": list of strings
+"""
+
+CHANGES_SCOPE = (
+    "The document text contained ONLY the sections that changed since the previous edition "
+    "(added, removed or modified paragraphs). Summarize what changed.\n"
+)
+
+
+class MapReduceSummarizer:
+    """
+    Hierarchical summarization over the full text.
+
+    Map: every chunk is summarized in parallel into a keyword-independent
+    summary + topics, cached in chunk_summaries by chunk hash.
+    Reduce: partial results are merged (recursively if they are too long)
+    and matched against the keyword list. After a keyword change only the
+    final reduce call is paid for again.
+    """
+
+    def __init__(self, client, model: str = OPENAI_MODEL, max_workers: int = LLM_MAX_WORKERS):
+        self.client = client
+        self.model = model
+        self.max_workers = max_workers
+
+    def _complete_json(self, prompt: str, text: str) -> dict:
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You output only valid JSON."},
+                {"role": "user", "content": prompt + "\n\nDocument:\n" + text},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+        )
+        return json.loads(resp.choices[0].message.content)
+
+    def _chunk_key(self, chunk: str) -> str:
+        return text_hash(f"{self.model}\n{chunk}")
+
+    def _map_chunk(self, chunk: str) -> dict:
+        data = self._complete_json(MAP_PROMPT, chunk)
+        result = {
+            "summary": data.get("summary", ""),
+            "topics": [t for t in data.get("topics", []) if isinstance(t, str)],
+        }
+        save_chunk_summary(self._chunk_key(chunk), result["summary"], result["topics"])
+        return result
+
+    def map(self, chunks: List[str], on_progress: Optional[Callable] = None) -> List[dict]:
+        """
+        Summarize chunks, calling the LLM only for chunks not in the cache.
+        on_progress is called after each summarized chunk.
+        """
+        keys = [self._chunk_key(c) for c in chunks]
+        cached = get_chunk_summaries(list(set(keys)))
+        missing = [c for c, k in zip(chunks, keys) if k not in cached]
+        logger.info(
+            f"[MapReduceSummarizer] {len(chunks)} chunk(s), {len(chunks) - len(missing)} cached, "
+            f"{len(missing)} to summarize"
+        )
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                try:
+                    for chunk, result in zip(missing, pool.map(self._map_chunk, missing)):
+                        cached[self._chunk_key(chunk)] = result
+                        if on_progress:
+                            on_progress()
+                except BaseException:
+                    # e.g. the lease was lost: do not pay for the chunks not started yet
+                    pool.shutdown(cancel_futures=True)
+                    raise
+        return [cached[k] for k in keys]
+
+    @staticmethod
+    def _render_partials(partials: List[dict]) -> str:
+        return "\n\n".join(
+            f"Part {i}:\nSummary: {p['summary']}\nTopics: {', '.join(p['topics'])}"
+            for i, p in enumerate(partials, start=1)
+        )
+
+    def summarize(
+        self,
+        text: str,
+        keywords: List[str],
+        changes_only: bool = False,
+        on_progress: Optional[Callable] = None,
+    ) -> tuple[str, List[str]]:
+        partials = self.map(chunk_text(text, CHUNK_MAX_CHARS), on_progress)
+        if not partials:
+            return "", []
+
+        # Intermediate levels go through map() too, so they are cached as well
+        rendered = self._render_partials(partials)
+        while len(rendered) > REDUCE_MAX_CHARS and len(partials) > 1:
+            groups = chunk_text(rendered, REDUCE_MAX_CHARS)
+            if len(groups) >= len(partials):
+                # Partials too long to pack several per group: merge them pairwise,
+                # which always halves the count
+                groups = [
+                    self._render_partials(partials[i:i + 2])
+                    for i in range(0, len(partials), 2)
+                ]
+            partials = self.map(groups, on_progress)
+            rendered = self._render_partials(partials)
+
+        if len(rendered) > REDUCE_MAX_CHARS:
+            logger.warning(
+                f"[MapReduceSummarizer] Merged summary is {len(rendered)} chars, "
+                f"truncating to {REDUCE_MAX_CHARS} for the final reduce"
+            )
+
+        prompt = REDUCE_PROMPT.format(
+            scope=CHANGES_SCOPE if changes_only else "",
+            keywords=", ".join(keywords),
+        )
+        data = self._complete_json(prompt, rendered[:REDUCE_MAX_CHARS])
+        return data.get("summary", ""), data.get("matched_keywords", [])
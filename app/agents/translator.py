@@ -1,13 +1,15 @@
 # app/agents/translator.py
+from concurrent.futures import ThreadPoolExecutor
 from http import client
-from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from openai import OpenAI
 
-from ..config import OPENAI_API_KEY
+from ..config import OPENAI_API_KEY, OPENAI_MODEL, CHUNK_MAX_CHARS, LLM_MAX_WORKERS
 from ..utils.logging_utils import setup_logging
-from ..utils.pdf_utils import extract_text_from_pdf
-from ..models import get_untranslated_documents, update_document_translation
+from ..utils.text_utils import iter_chunks, iter_parts, text_hash
+from .indexer import KeywordIndexAgent
+from .stages import process_stage
+from ..models import get_chunk_translations, save_chunk_translation, update_document_translation
 
 logger = setup_logging()
 
@@ -17,14 +19,14 @@ class TranslationAgent:
             logger.warning("[TranslationAgent] OPENAI_API_KEY is not set!")
         self.target_language = target_language
         self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.indexer = KeywordIndexAgent()
 
-    def translate_text(self, text: str) -> str:
+    def translate_chunk(self, text: str) -> str:
         """
         Simple translation using OpenAI ChatCompletion (you can refine prompt).
         """
-        logger.info("[TranslationAgent] Calling OpenAI for translation...")
         resp = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=OPENAI_MODEL,
             messages=[
                 {
                     "role": "system",
@@ -32,12 +34,49 @@ class TranslationAgent:
                 },
                 {
                     "role": "user",
-                    "content": text[:6000]  # crude truncation to avoid huge prompts
+                    "content": text
                 }
             ],
             temperature=0.1,
         )
         return resp.choices[0].message.content
+
+    def _chunk_key(self, chunk: str) -> str:
+        return text_hash(f"{OPENAI_MODEL}\n{self.target_language}\n{chunk}")
+
+    def _translate_and_cache(self, chunk: str) -> str:
+        translated = self.translate_chunk(chunk)
+        save_chunk_translation(self._chunk_key(chunk), translated)
+        return translated
+
+    def translate_text(self, text: str, on_progress: Optional[Callable] = None) -> str:
+        """
+        Translate the whole text: chunks are translated in parallel and joined back in order.
+        Page-aligned chunks stored by the parser are kept; other text is split on lines.
+        Each translated chunk is cached by hash, so a retry after a crash or a
+        lost lease only pays for the chunks that were not done yet.
+        on_progress is called after each chunk (used to renew the stage lease).
+        """
+        chunks = [c for c in iter_chunks(iter_parts(text), CHUNK_MAX_CHARS) if c.strip()]
+        keys = [self._chunk_key(c) for c in chunks]
+        cached = get_chunk_translations(list(set(keys)))
+        missing = {k: c for c, k in zip(chunks, keys) if k not in cached}
+        logger.info(
+            f"[TranslationAgent] {len(chunks)} chunk(s), {len(chunks) - len(missing)} cached, "
+            f"{len(missing)} to translate"
+        )
+        if missing:
+            with ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS) as pool:
+                try:
+                    for key, part in zip(missing, pool.map(self._translate_and_cache, missing.values())):
+                        cached[key] = part
+                        if on_progress:
+                            on_progress()
+                except BaseException:
+                    # e.g. the lease was lost: do not pay for the chunks not started yet
+                    pool.shutdown(cancel_futures=True)
+                    raise
+        return "\n\n".join(cached[k] for k in keys)
     
     def translate_keywords_gpt(keywords, target_lang):
         """Translate a list of keywords using GPT."""
@@ -63,16 +102,22 @@ class TranslationAgent:
         translated = response.choices[0].message.content
         return [k.strip() for k in translated.split(",")]
 
-    def run(self):
-        docs = get_untranslated_documents()
-        logger.info(f"[TranslationAgent] Documents to translate: {len(docs)}")
-        for doc in docs:
-            file_path = doc["file_path"]
-            text = extract_text_from_pdf(Path(file_path))
-            if not text.strip():
-                logger.warning(f"[TranslationAgent] Empty text for {file_path}, skipping")
-                continue
-            translated = self.translate_text(text)
-            update_document_translation(doc["id"], translated)
-            logger.info(f"[TranslationAgent] Translated document id={doc['id']}")
-            
\ No newline at end of file
+    def process_document(self, doc, lease=None):
+        if doc["translated_text"] is not None:
+            return  # already translated by an earlier (interrupted) run
+
+        text = doc["source_text"] or ""
+        if not text.strip():
+            # e.g. an image-only PDF: fail so the document ends up in the
+            # dead-letter view instead of silently stopping here
+            raise ValueError(f"No text to translate in {doc['file_path']}")
+
+        translated = self.translate_text(text, on_progress=lease.renew if lease else None)
+        update_document_translation(doc["id"], translated)
+        self.indexer.index_document(doc["id"], translated)
+        logger.info(f"[TranslationAgent] Translated document id={doc['id']}")
+
+    def run(self, worker_id: Optional[str] = None, batch_size: int = 10) -> dict:
+        stats = process_stage("translate", self.process_document, worker_id, batch_size)
+        logger.info(f"[TranslationAgent] Run finished: {stats}")
+        return stats
@@ -0,0 +1,136 @@
+# app/agents/worker_pool.py
+import multiprocessing as mp
+import signal
+import time
+
+from ..utils.logging_utils import setup_logging
+from .stages import default_worker_id
+
+logger = setup_logging()
+
+WORKER_STAGES = ["extract", "parse", "translate", "analyse", "notify"]
+
+def _build_agent(stage: str, options: dict):
+    # Imported here so each process only creates the clients it needs
+    if stage == "parse":
+        from .parser import ParsingAgent
+        return ParsingAgent()
+    if stage == "translate":
+        from .translator import TranslationAgent
+        return TranslationAgent(options["target_language"])
+    if stage == "analyse":
+        from .analyzer import KeywordAnalysisAgent
+        return KeywordAnalysisAgent(options["extra_keywords"])
+    if stage == "notify":
+        from .notifier import NotificationAgent
+        return NotificationAgent()
+    raise ValueError(f"Unknown stage: {stage}")
+
+def _evaluate_keywords(options: dict):
+    # Refresh the keyword set last applied (dashboard or pipeline run); the
+    # worker's own keywords are only the starting set
+    from .analyzer import DEFAULT_KEYWORDS
+    from .indexer import KeywordIndexAgent
+    from ..models import get_index_keywords
+    agent = KeywordIndexAgent()
+    if get_index_keywords() is None:
+        agent.evaluate(DEFAULT_KEYWORDS + options["extra_keywords"])
+    else:
+        agent.evaluate()
+
+def _run_extraction(options: dict) -> int:
+    from .extractor import ExtractionAgent
+    new_count = 0
+    for code in options["authority_codes"]:
+        try:
+            new_count += ExtractionAgent(code).run()
+        except Exception:
+            logger.exception(f"[Worker extract] Extraction failed for {code}")
+    return new_count
+
+def stage_worker(stage: str, index: int, options: dict, stop_event):
+    """Process entry point: keep claiming work for one stage until stop_event is set."""
+    # Ctrl-C is handled by the parent, which stops workers between documents.
+    # The parent's SIGTERM handler is inherited through fork: restore the
+    # default so terminate() after the shutdown timeout really kills us.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    worker_id = f"{default_worker_id()}:{stage}-{index}"
+    logger.info(f"[Worker {worker_id}] Started")
+
+    agent = None if stage == "extract" else _build_agent(stage, options)
+    pending_evaluation = False
+    while not stop_event.is_set():
+        if stage == "extract":
+            _run_extraction(options)
+            stop_event.wait(options["extract_interval"])
+            continue
+        try:
+            # One document per claim so parallel workers share the queue evenly
+            stats = agent.run(worker_id=worker_id, batch_size=1)
+            busy = any(stats.values())
+        except Exception:
+            logger.exception(f"[Worker {worker_id}] Run failed")
+            busy = False
+        # Translations feed the keyword index: refresh the index matches
+        # once the queue has drained, as run_full_pipeline does after its
+        # translation step
+        pending_evaluation = pending_evaluation or (stage == "translate" and busy)
+        if pending_evaluation and not busy:
+            try:
+                _evaluate_keywords(options)
+            except Exception:
+                logger.exception(f"[Worker {worker_id}] Keyword evaluation failed")
+            pending_evaluation = False
+        if not busy:
+            stop_event.wait(options["poll_seconds"])
+
+    logger.info(f"[Worker {worker_id}] Stopped")
+
+def run_workers(counts: dict, options: dict):
+    """
+    Start counts[stage] processes per stage and supervise them: crashed
+    processes are restarted, SIGINT/SIGTERM stop everything gracefully.
+    Leases in document_stages guarantee no row is processed twice.
+    """
+    stop_event = mp.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    def start(stage, index):
+        p = mp.Process(
+            target=stage_worker,
+            args=(stage, index, options, stop_event),
+            name=f"{stage}-{index}",
+        )
+        p.start()
+        return p
+
+    procs = {
+        (stage, i): start(stage, i)
+        for stage in WORKER_STAGES
+        for i in range(counts.get(stage, 0))
+    }
+    logger.info(f"[WorkerPool] Started {len(procs)} worker process(es): {counts}")
+
+    try:
+        while not stop_event.is_set():
+            for key, p in procs.items():
+                if not p.is_alive():
+                    logger.warning(f"[WorkerPool] Worker {p.name} exited with code {p.exitcode}, restarting")
+                    procs[key] = start(*key)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+    logger.info("[WorkerPool] Stopping workers...")
+    for p in procs.values():
+        p.join(timeout=options["shutdown_timeout"])
+        if p.is_alive():
+            # Its lease expires and another worker picks the document up later
+            p.terminate()
+            p.join(timeout=5)
+        if p.is_alive():
+            logger.warning(f"[WorkerPool] Worker {p.name} ignored SIGTERM, killing it")
+            p.kill()
+            p.join()
+    logger.info("[WorkerPool] All workers stopped")
@@ -50,3 +50,14 @@ AUTHORITIES = {
     #     "docs_page": "https://www.banque-france.fr/la-banque-de-france/communiques",
     # },
 }
+
+# LLM processing
+OPENAI_MODEL = "gpt-4o-mini"
+CHUNK_MAX_CHARS = 8000          # size of one map/translation chunk
+REDUCE_MAX_CHARS = 12000        # above this, partial summaries are merged hierarchically
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+
+# Pipeline stage bookkeeping
+PIPELINE_MAX_ATTEMPTS = int(os.getenv("PIPELINE_MAX_ATTEMPTS", "5"))      # then dead-lettered
+PIPELINE_BACKOFF_SECONDS = int(os.getenv("PIPELINE_BACKOFF_SECONDS", "60"))  # doubled on every failure
+PIPELINE_LEASE_SECONDS = int(os.getenv("PIPELINE_LEASE_SECONDS", "1800"))   # a crashed worker's rows are reclaimed after this
@@ -3,14 +3,42 @@ import sqlite3
 from .config import DB_PATH
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+    # Several worker processes share the database; wait for locks instead of failing
+    conn = sqlite3.connect(DB_PATH, timeout=30)
     conn.row_factory = sqlite3.Row
     return conn
 
+def _ensure_column(cur, table: str, column: str, decl: str):
+    cur.execute(f"PRAGMA table_info({table})")
+    if column not in {row["name"] for row in cur.fetchall()}:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def _migrate_matched_keywords(cur):
+    """One-time copy of the legacy comma-joined matched_keywords into document_keywords."""
+    cur.execute("SELECT 1 FROM document_keywords WHERE source='llm' LIMIT 1")
+    if cur.fetchone():
+        return
+    cur.execute("SELECT id, matched_keywords, updated_at FROM documents WHERE matched_keywords <> ''")
+    cur.executemany(
+        """
+        INSERT OR IGNORE INTO document_keywords (doc_id, keyword, source, hits, updated_at)
+        VALUES (?,?,'llm',NULL,?)
+        """,
+        [
+            (row["id"], kw.strip(), row["updated_at"])
+            for row in cur.fetchall()
+            for kw in row["matched_keywords"].split(",")
+            if kw.strip()
+        ],
+    )
+
 def init_db():
     conn = get_connection()
     cur = conn.cursor()
 
+    # WAL lets readers run while a worker holds the write lock
+    cur.execute("PRAGMA journal_mode=WAL")
+
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS documents (
@@ -25,7 +53,124 @@ def init_db():
             translated_text TEXT,
             analysis_summary TEXT,
             matched_keywords TEXT,
-            last_notified_at TEXT
+            last_notified_at TEXT,
+            title_stem TEXT,
+            previous_version_id INTEGER,
+            diff_text TEXT,
+            indexed_at TEXT,
+            source_text TEXT,
+            heading TEXT,
+            version_label TEXT,
+            published TEXT,
+            linked_at TEXT,
+            notify_started_at TEXT
+        );
+        """
+    )
+
+    # Columns added after the first release; older databases get them here
+    _ensure_column(cur, "documents", "title_stem", "TEXT")
+    _ensure_column(cur, "documents", "previous_version_id", "INTEGER")
+    _ensure_column(cur, "documents", "diff_text", "TEXT")
+    _ensure_column(cur, "documents", "indexed_at", "TEXT")
+    _ensure_column(cur, "documents", "source_text", "TEXT")
+    _ensure_column(cur, "documents", "heading", "TEXT")
+    _ensure_column(cur, "documents", "version_label", "TEXT")
+    _ensure_column(cur, "documents", "published", "TEXT")
+    _ensure_column(cur, "documents", "linked_at", "TEXT")
+    _ensure_column(cur, "documents", "notify_started_at", "TEXT")
+
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_stem ON documents (authority, title_stem)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents (authority, content_hash)"
+    )
+
+    # Map-step results of the summarizer, keyed by chunk hash
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chunk_summaries (
+            chunk_hash TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            topics TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+
+    # Cache of translated chunks, so a retried translation only pays for what is missing
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chunk_translations (
+            chunk_hash TEXT PRIMARY KEY,
+            translation TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+
+    # Term-position inverted index over translated_text
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS term_postings (
+            term TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            positions TEXT NOT NULL,
+            PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID;
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_term_postings_doc ON term_postings (doc_id)"
+    )
+
+    # Matched keywords per document; source is "llm" (analysis) or "index" (query-time evaluation)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS document_keywords (
+            doc_id INTEGER NOT NULL,
+            keyword TEXT NOT NULL,
+            source TEXT NOT NULL,
+            hits INTEGER,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (doc_id, keyword, source)
+        );
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_document_keywords_kw ON document_keywords (keyword)"
+    )
+    _migrate_matched_keywords(cur)
+
+    # Per-document stage state: retries, backoff, dead-lettering and worker leases
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS document_stages (
+            doc_id INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            lease_owner TEXT,
+            lease_expires_at TEXT,
+            last_error TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (doc_id, stage)
+        );
+        """
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_document_stages_claim ON document_stages (stage, status, next_attempt_at)"
+    )
+
+    # Small shared state, e.g. the keyword set last evaluated on the index (JSON values)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TEXT NOT NULL
         );
         """
     )
@@ -1,11 +1,37 @@
 # app/models.py
-from datetime import datetime
+import json
+import re
+from datetime import datetime, timedelta
 from typing import Optional, List
 from .db import get_connection
+from .utils.version_utils import MONTHS, version_sort_key
+
+_STEM_NOISE = set(MONTHS) | {"draft", "final", "updated", "revised"}
+_STEM_VERSION_RE = re.compile(r"\b(?:version|v)\s*\d[\d.]*", re.IGNORECASE)
 
 def now_iso() -> str:
     return datetime.utcnow().isoformat()
 
+def iso_in(seconds: float) -> str:
+    return (datetime.utcnow() + timedelta(seconds=seconds)).isoformat()
+
+def title_stem(title: str, heading: str = "") -> str:
+    """
+    Normalise a document title so successive editions share the same stem,
+    e.g. "Technical specifications v2.1 (March 2024)" -> "technical specifications".
+    Only "version <number>" is stripped, so "version with revision marks" stays
+    as is. The heading read from the first page is appended because link
+    texts alone are often shared by unrelated documents.
+    """
+    def normalise(text):
+        words = re.findall(r"[a-z]+", _STEM_VERSION_RE.sub(" ", (text or "").lower()))
+        return " ".join(w for w in words if w not in _STEM_NOISE)
+
+    stem = normalise(title)
+    if heading:
+        stem += " / " + normalise(heading)
+    return stem
+
 def get_document_by_hash(authority: str, content_hash: str):
     conn = get_connection()
     cur = conn.cursor()
@@ -24,23 +50,211 @@ def insert_document(authority: str, title: str, url: str, file_path: str, conten
         """
         INSERT INTO documents (
             authority, title, url, file_path, content_hash,
-            created_at, updated_at
-        ) VALUES (?,?,?,?,?,?,?)
+            created_at, updated_at, title_stem
+        ) VALUES (?,?,?,?,?,?,?,?)
         """,
-        (authority, title, url, file_path, content_hash, now_iso(), now_iso()),
+        (authority, title, url, file_path, content_hash, now_iso(), now_iso(), title_stem(title)),
     )
     conn.commit()
     doc_id = cur.lastrowid
     conn.close()
     return doc_id
 
+def get_document_hashes(authority: str) -> set:
+    """All content hashes already stored for an authority, for in-memory dedupe."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT content_hash FROM documents WHERE authority=?", (authority,))
+    hashes = {r["content_hash"] for r in cur.fetchall()}
+    conn.close()
+    return hashes
+
+def insert_documents(rows: List[dict]) -> int:
+    """
+    Bulk insert documents in a single transaction, in the order given.
+    rows: dicts with authority, title, url, file_path, content_hash and,
+    optionally, the first-page identity (heading, version_label, published).
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    ts = now_iso()
+    cur.executemany(
+        """
+        INSERT INTO documents (
+            authority, title, url, file_path, content_hash,
+            created_at, updated_at, title_stem, heading, version_label, published
+        ) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+        """,
+        [
+            (
+                r["authority"], r["title"], r["url"], r["file_path"], r["content_hash"], ts, ts,
+                title_stem(r["title"], r.get("heading") or ""),
+                r.get("heading"), r.get("version_label"), r.get("published"),
+            )
+            for r in rows
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+def get_document(doc_id: int):
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM documents WHERE id=?", (doc_id,))
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+def get_unidentified_documents(authority: str):
+    """Documents whose first-page identity (heading, version, date) was not read yet."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id, title, file_path FROM documents WHERE authority=? AND heading IS NULL",
+        (authority,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def update_document_identities(rows: List[dict]):
+    """rows: dicts with id, title, heading, version_label, published."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        UPDATE documents SET heading=?, version_label=?, published=?, title_stem=?
+        WHERE id=?
+        """,
+        [
+            (r["heading"], r["version_label"], r["published"], title_stem(r["title"], r["heading"]), r["id"])
+            for r in rows
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+def link_document_versions(authority: Optional[str] = None) -> int:
+    """
+    Chain documents with the same title stem from the same authority.
+    Editions are ordered by version number, then publication date (insertion
+    order only breaks ties), and each one points at the edition before it.
+    The chains are recomputed as a whole, because an older edition can be
+    imported after newer ones. Documents already parsed against their old
+    link are reset to be parsed again (see _reset_stage_outputs).
+    Identified documents are stamped with linked_at, which makes them ready
+    for parsing. Returns the number of rows whose link changed.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+
+    # Backfill stems for rows inserted before versioning existed
+    cur.execute("SELECT id, title FROM documents WHERE title_stem IS NULL")
+    cur.executemany(
+        "UPDATE documents SET title_stem=? WHERE id=?",
+        [(title_stem(r["title"]), r["id"]) for r in cur.fetchall()],
+    )
+
+    query = """
+        SELECT id, authority, title_stem, version_label, published, previous_version_id,
+               source_text IS NOT NULL AS parsed,
+               heading IS NOT NULL AND linked_at IS NULL AS newly_linked
+        FROM documents
+    """
+    params = ()
+    if authority:
+        query += " WHERE authority=?"
+        params = (authority,)
+    cur.execute(query, params)
+
+    editions = {}
+    newly_linked = []
+    for row in cur.fetchall():
+        if row["newly_linked"]:
+            newly_linked.append((now_iso(), row["id"]))
+        editions.setdefault((row["authority"], row["title_stem"]), []).append(row)
+
+    links = []
+    stale = []
+    for (_, stem), rows in editions.items():
+        if not stem:
+            continue
+        rows.sort(key=lambda r: version_sort_key(r["version_label"], r["published"], r["id"]))
+        previous_id = None
+        for row in rows:
+            if row["previous_version_id"] != previous_id:
+                links.append((previous_id, row["id"]))
+                if row["parsed"]:
+                    stale.append(row["id"])
+            previous_id = row["id"]
+
+    cur.executemany("UPDATE documents SET previous_version_id=? WHERE id=?", links)
+    _reset_stage_outputs(cur, "parse", stale)
+    cur.executemany("DELETE FROM document_stages WHERE doc_id=? AND stage='parse'", [(i,) for i in stale])
+    cur.executemany("UPDATE documents SET linked_at=? WHERE id=?", newly_linked)
+    conn.commit()
+    conn.close()
+    return len(links)
+
+# Stages whose results feed the next one, and the columns each stage produces
+_DERIVED_STAGES = ["parse", "translate", "analyse"]
+_STAGE_OUTPUTS = {
+    "parse": "source_text=NULL, diff_text=NULL",
+    "translate": "translated_text=NULL, indexed_at=NULL",
+    "analyse": "analysis_summary=NULL, matched_keywords=NULL",
+    "notify": "last_notified_at=NULL, notify_started_at=NULL",
+}
+
+def _reset_stage_outputs(cur, stage: str, doc_ids: List[int]):
+    """
+    Clear what `stage` produced for the documents, and what the stages after
+    it derived from that, and drop those later stages' rows. Handlers return
+    early when their output is already set, so without this a rerun is a no-op.
+    Notification is only reset for the notify stage itself: a re-parsed or
+    re-analysed document is not emailed twice.
+    """
+    if not doc_ids:
+        return
+    stages = _DERIVED_STAGES[_DERIVED_STAGES.index(stage):] if stage in _DERIVED_STAGES else [stage]
+    params = [(doc_id,) for doc_id in doc_ids]
+    cur.executemany(
+        f"UPDATE documents SET {', '.join(_STAGE_OUTPUTS[s] for s in stages)}, updated_at=? WHERE id=?",
+        [(now_iso(), doc_id) for doc_id in doc_ids],
+    )
+    if "translate" in stages:
+        cur.executemany("DELETE FROM term_postings WHERE doc_id=?", params)
+        cur.executemany("DELETE FROM document_keywords WHERE doc_id=? AND source='index'", params)
+    if "analyse" in stages:
+        cur.executemany("DELETE FROM document_keywords WHERE doc_id=? AND source='llm'", params)
+    later = stages[1:]
+    if later:
+        cur.executemany(
+            f"DELETE FROM document_stages WHERE doc_id=? AND stage IN ({','.join('?' * len(later))})",
+            [(doc_id, *later) for doc_id in doc_ids],
+        )
+    if stage in _DERIVED_STAGES:
+        # A pending notification would otherwise go out without an analysis
+        cur.executemany("DELETE FROM document_stages WHERE doc_id=? AND stage='notify' AND status<>'done'", params)
+
+def update_document_source(doc_id: int, source_text: str, diff_text: Optional[str] = None):
+    """Store the parsed text to translate; diff_text is set when only changes were kept."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE documents SET source_text=?, diff_text=?, updated_at=? WHERE id=?",
+        (source_text, diff_text, now_iso(), doc_id),
+    )
+    conn.commit()
+    conn.close()
+
 def update_document_translation(doc_id: int, translated_text: str):
     conn = get_connection()
     cur = conn.cursor()
     cur.execute(
         """
         UPDATE documents
-        SET translated_text=?, updated_at=?
+        SET translated_text=?, indexed_at=NULL, updated_at=?
         WHERE id=?
         """,
         (translated_text, now_iso(), doc_id),
@@ -59,6 +273,25 @@ def update_document_analysis(doc_id: int, summary: str, matched_keywords: List[s
         """,
         (summary, ",".join(matched_keywords), now_iso(), doc_id),
     )
+    cur.execute("DELETE FROM document_keywords WHERE doc_id=? AND source='llm'", (doc_id,))
+    cur.executemany(
+        """
+        INSERT OR IGNORE INTO document_keywords (doc_id, keyword, source, hits, updated_at)
+        VALUES (?,?,'llm',NULL,?)
+        """,
+        [(doc_id, kw, now_iso()) for kw in matched_keywords],
+    )
+    conn.commit()
+    conn.close()
+
+def set_notification_sending(doc_id: int, sending: bool):
+    """Set (before sending the email) or clear (when sending failed) the in-flight marker."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE documents SET notify_started_at=? WHERE id=?",
+        (now_iso() if sending else None, doc_id),
+    )
     conn.commit()
     conn.close()
 
@@ -106,21 +339,416 @@ def get_unnotified_documents():
     conn.close()
     return rows
 
-def get_recent_documents(limit: int = 20):
+def get_unindexed_documents():
     conn = get_connection()
     cur = conn.cursor()
     cur.execute(
-        "SELECT * FROM documents ORDER BY created_at DESC LIMIT ?",
-        (limit,),
+        "SELECT id, translated_text FROM documents WHERE translated_text IS NOT NULL AND indexed_at IS NULL"
     )
     rows = cur.fetchall()
     conn.close()
     return rows
 
+def get_recent_documents(limit: int = 20, keywords: Optional[List[str]] = None):
+    """Most recent documents; with keywords, only those matching any of them."""
+    conn = get_connection()
+    cur = conn.cursor()
+    if keywords:
+        placeholders = ",".join("?" * len(keywords))
+        cur.execute(
+            f"""
+            SELECT * FROM documents WHERE id IN (
+                SELECT doc_id FROM document_keywords WHERE keyword IN ({placeholders})
+            )
+            ORDER BY created_at DESC LIMIT ?
+            """,
+            (*keywords, limit),
+        )
+    else:
+        cur.execute(
+            "SELECT * FROM documents ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
 def delete_document(doc_id: int):
     conn = get_connection()
     cur = conn.cursor()
+    cur.execute("DELETE FROM term_postings WHERE doc_id=?", (doc_id,))
+    cur.execute("DELETE FROM document_keywords WHERE doc_id=?", (doc_id,))
+    cur.execute("DELETE FROM document_stages WHERE doc_id=?", (doc_id,))
     cur.execute("DELETE FROM documents WHERE id=?", (doc_id,))
     conn.commit()
     conn.close()
-    
\ No newline at end of file
+    
+def get_chunk_summaries(chunk_hashes: List[str]) -> dict:
+    """Return {chunk_hash: {"summary": str, "topics": list}} for the cached hashes."""
+    if not chunk_hashes:
+        return {}
+    conn = get_connection()
+    cur = conn.cursor()
+    placeholders = ",".join("?" * len(chunk_hashes))
+    cur.execute(
+        f"SELECT * FROM chunk_summaries WHERE chunk_hash IN ({placeholders})",
+        list(chunk_hashes),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return {
+        r["chunk_hash"]: {"summary": r["summary"], "topics": json.loads(r["topics"])}
+        for r in rows
+    }
+
+def save_chunk_summary(chunk_hash: str, summary: str, topics: List[str]):
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT OR REPLACE INTO chunk_summaries (chunk_hash, summary, topics, created_at)
+        VALUES (?,?,?,?)
+        """,
+        (chunk_hash, summary, json.dumps(topics), now_iso()),
+    )
+    conn.commit()
+    conn.close()
+
+def get_chunk_translations(chunk_hashes: List[str]) -> dict:
+    """Return {chunk_hash: translation} for the cached hashes."""
+    if not chunk_hashes:
+        return {}
+    conn = get_connection()
+    cur = conn.cursor()
+    placeholders = ",".join("?" * len(chunk_hashes))
+    cur.execute(
+        f"SELECT chunk_hash, translation FROM chunk_translations WHERE chunk_hash IN ({placeholders})",
+        list(chunk_hashes),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return {r["chunk_hash"]: r["translation"] for r in rows}
+
+def save_chunk_translation(chunk_hash: str, translation: str):
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT OR REPLACE INTO chunk_translations (chunk_hash, translation, created_at)
+        VALUES (?,?,?)
+        """,
+        (chunk_hash, translation, now_iso()),
+    )
+    conn.commit()
+    conn.close()
+
+def save_document_postings(doc_id: int, postings: dict):
+    """Replace the inverted-index postings of one document. postings: term -> encoded positions."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM term_postings WHERE doc_id=?", (doc_id,))
+    cur.executemany(
+        "INSERT INTO term_postings (term, doc_id, positions) VALUES (?,?,?)",
+        [(term, doc_id, positions) for term, positions in postings.items()],
+    )
+    cur.execute("UPDATE documents SET indexed_at=? WHERE id=?", (now_iso(), doc_id))
+    conn.commit()
+    conn.close()
+
+def get_term_postings(terms: List[str]) -> dict:
+    """Return {term: {doc_id: encoded positions}} for the given terms."""
+    if not terms:
+        return {}
+    conn = get_connection()
+    cur = conn.cursor()
+    placeholders = ",".join("?" * len(terms))
+    cur.execute(
+        f"SELECT term, doc_id, positions FROM term_postings WHERE term IN ({placeholders})",
+        list(terms),
+    )
+    result = {}
+    for r in cur.fetchall():
+        result.setdefault(r["term"], {})[r["doc_id"]] = r["positions"]
+    conn.close()
+    return result
+
+def replace_index_keywords(hits: dict):
+    """
+    Store the result of one query-time keyword evaluation. hits maps
+    keyword -> {doc_id: count}; it replaces every previous index result, so
+    keywords dropped from the keyword set disappear as well. The keyword set
+    itself is saved too (see get_index_keywords).
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM document_keywords WHERE source='index'")
+    ts = now_iso()
+    cur.execute(
+        "INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES ('index_keywords', ?, ?)",
+        (json.dumps(list(hits)), ts),
+    )
+    cur.executemany(
+        """
+        INSERT INTO document_keywords (doc_id, keyword, source, hits, updated_at)
+        VALUES (?,?,'index',?,?)
+        """,
+        [
+            (doc_id, kw, count, ts)
+            for kw, per_doc in hits.items()
+            for doc_id, count in per_doc.items()
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+def get_index_keywords() -> Optional[List[str]]:
+    """Keyword set of the last index evaluation, or None if none was run yet."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT value FROM settings WHERE key='index_keywords'")
+    row = cur.fetchone()
+    conn.close()
+    return json.loads(row["value"]) if row else None
+
+def get_document_keywords(doc_id: int):
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT keyword, source, hits FROM document_keywords WHERE doc_id=? ORDER BY keyword",
+        (doc_id,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def get_known_keywords() -> List[str]:
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT keyword FROM document_keywords ORDER BY keyword")
+    rows = [r["keyword"] for r in cur.fetchall()]
+    conn.close()
+    return rows
+
+# -----------------------------------------------------------
+# Stage queue: one row per (document, stage)
+# -----------------------------------------------------------
+
+# Which documents are ready for a stage, derived from their columns
+STAGE_READY_SQL = {
+    # Only once the edition is linked, or a new edition would be parsed in full
+    "parse": "linked_at IS NOT NULL AND source_text IS NULL AND translated_text IS NULL",
+    "translate": "source_text IS NOT NULL AND translated_text IS NULL",
+    "analyse": "translated_text IS NOT NULL AND analysis_summary IS NULL",
+    "notify": "analysis_summary IS NOT NULL AND last_notified_at IS NULL",
+}
+
+def enqueue_ready_stages(stage: str) -> int:
+    """Create pending stage rows for ready documents that have none yet (idempotent)."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        INSERT OR IGNORE INTO document_stages (doc_id, stage, status, attempts, next_attempt_at, updated_at)
+        SELECT id, ?, 'pending', 0, ?, ? FROM documents WHERE {STAGE_READY_SQL[stage]}
+        """,
+        (stage, now_iso(), now_iso()),
+    )
+    conn.commit()
+    added = cur.rowcount
+    conn.close()
+    return added
+
+def claim_stage_documents(stage: str, worker_id: str, limit: int, lease_seconds: int, max_attempts: int):
+    """
+    Atomically lease up to `limit` documents for a stage and return their rows.
+    Rows whose lease expired (crashed worker) are reclaimed; the crashed run
+    counts as an attempt, so a document that keeps killing workers ends up dead.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    now = now_iso()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        cur.execute(
+            """
+            UPDATE document_stages
+            SET status='dead', lease_owner=NULL, lease_expires_at=NULL,
+                last_error=COALESCE(last_error, 'lease expired'), updated_at=?
+            WHERE stage=? AND status='running' AND lease_expires_at < ? AND attempts >= ?
+            """,
+            (now, stage, now, max_attempts),
+        )
+        cur.execute(
+            """
+            SELECT doc_id FROM document_stages
+            WHERE stage=? AND next_attempt_at <= ?
+              AND (status IN ('pending', 'failed') OR (status='running' AND lease_expires_at < ?))
+            ORDER BY next_attempt_at
+            LIMIT ?
+            """,
+            (stage, now, now, limit),
+        )
+        doc_ids = [r["doc_id"] for r in cur.fetchall()]
+        cur.executemany(
+            """
+            UPDATE document_stages
+            SET status='running', attempts=attempts+1, lease_owner=?, lease_expires_at=?, updated_at=?
+            WHERE doc_id=? AND stage=?
+            """,
+            [(worker_id, iso_in(lease_seconds), now, doc_id, stage) for doc_id in doc_ids],
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
+
+    rows = []
+    if doc_ids:
+        placeholders = ",".join("?" * len(doc_ids))
+        cur.execute(f"SELECT * FROM documents WHERE id IN ({placeholders}) ORDER BY id", doc_ids)
+        rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def renew_lease(doc_id: int, stage: str, worker_id: str, lease_seconds: int) -> bool:
+    """Extend a lease still held by worker_id. Returns False if it was lost."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        UPDATE document_stages SET lease_expires_at=?, updated_at=?
+        WHERE doc_id=? AND stage=? AND status='running' AND lease_owner=?
+        """,
+        (iso_in(lease_seconds), now_iso(), doc_id, stage, worker_id),
+    )
+    conn.commit()
+    ok = cur.rowcount == 1
+    conn.close()
+    return ok
+
+def requeue_stages(
+    stage: Optional[str] = None,
+    statuses: tuple = ("dead",),
+    doc_ids: Optional[List[int]] = None,
+) -> int:
+    """
+    Put stage rows back to pending with a fresh attempt budget, e.g. dead
+    notifications once SMTP is configured. Requeueing "done" rows also
+    clears the stage's output (see _reset_stage_outputs), e.g. to re-analyse
+    documents after a keyword change. Returns the number of rows reset.
+    """
+    where = f"status IN ({','.join('?' * len(statuses))})"
+    params = [*statuses]
+    if stage:
+        where += " AND stage=?"
+        params.append(stage)
+    if doc_ids:
+        where += f" AND doc_id IN ({','.join('?' * len(doc_ids))})"
+        params.extend(doc_ids)
+
+    conn = get_connection()
+    cur = conn.cursor()
+    if "done" in statuses:
+        cur.execute(f"SELECT doc_id, stage FROM document_stages WHERE {where} AND status='done'", params)
+        done = {}
+        for row in cur.fetchall():
+            done.setdefault(row["stage"], []).append(row["doc_id"])
+        for done_stage, done_ids in done.items():
+            _reset_stage_outputs(cur, done_stage, done_ids)
+    if stage in (None, "notify"):
+        # Requeueing is the operator's go-ahead to send notifications whose
+        # earlier attempt was interrupted mid-send
+        cur.execute(
+            f"""
+            UPDATE documents SET notify_started_at=NULL
+            WHERE id IN (SELECT doc_id FROM document_stages WHERE {where} AND stage='notify')
+            """,
+            params,
+        )
+    cur.execute(
+        f"""
+        UPDATE document_stages
+        SET status='pending', attempts=0, next_attempt_at=?, lease_owner=NULL,
+            lease_expires_at=NULL, last_error=NULL, updated_at=?
+        WHERE {where}
+        """,
+        [now_iso(), now_iso(), *params],
+    )
+    conn.commit()
+    count = cur.rowcount
+    conn.close()
+    return count
+
+def complete_stage(doc_id: int, stage: str, worker_id: str) -> bool:
+    """Mark a leased stage as done. Returns False if the lease was lost to another worker."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        UPDATE document_stages
+        SET status='done', lease_owner=NULL, lease_expires_at=NULL, last_error=NULL, updated_at=?
+        WHERE doc_id=? AND stage=? AND lease_owner=?
+        """,
+        (now_iso(), doc_id, stage, worker_id),
+    )
+    conn.commit()
+    ok = cur.rowcount == 1
+    conn.close()
+    return ok
+
+def fail_stage(doc_id: int, stage: str, worker_id: str, error: str, max_attempts: int, backoff_seconds: int) -> str:
+    """
+    Record a failed attempt: exponential backoff, or dead-letter once
+    max_attempts is reached. Returns the new status.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT attempts FROM document_stages WHERE doc_id=? AND stage=? AND lease_owner=?",
+        (doc_id, stage, worker_id),
+    )
+    row = cur.fetchone()
+    if row is None:
+        conn.close()
+        return "lost"
+
+    attempts = row["attempts"]
+    status = "dead" if attempts >= max_attempts else "failed"
+    cur.execute(
+        """
+        UPDATE document_stages
+        SET status=?, next_attempt_at=?, lease_owner=NULL, lease_expires_at=NULL,
+            last_error=?, updated_at=?
+        WHERE doc_id=? AND stage=?
+        """,
+        (status, iso_in(backoff_seconds * 2 ** (attempts - 1)), error[:2000], now_iso(), doc_id, stage),
+    )
+    conn.commit()
+    conn.close()
+    return status
+
+def get_stage_counts() -> dict:
+    """Return {stage: {status: count}}."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT stage, status, COUNT(*) AS n FROM document_stages GROUP BY stage, status")
+    counts = {}
+    for r in cur.fetchall():
+        counts.setdefault(r["stage"], {})[r["status"]] = r["n"]
+    conn.close()
+    return counts
+
+def get_dead_stages():
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT s.doc_id, s.stage, s.attempts, s.last_error, d.title, d.authority
+        FROM document_stages s JOIN documents d ON d.id = s.doc_id
+        WHERE s.status='dead' ORDER BY s.updated_at DESC
+        """
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
@@ -0,0 +1,188 @@
+# app/utils/diff_utils.py
+import hashlib
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Iterable, List, Optional, Sequence
+
+_DIGITS_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"\w")
+_NON_SHAPE_RE = re.compile(r"[^a-z#]+")
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*\d+|\d+\s*/\s*\d+|\d+)$", re.IGNORECASE)
+_SENTENCE_END = (".", ":", ";", "!", "?")
+
+
+@dataclass
+class ChangedSection:
+    kind: str  # "added", "removed" or "modified"
+    page: int  # 1-based page number (new version, or old version for "removed")
+    text: str  # for "modified", a word-level delta (see word_delta)
+    last_page: Optional[int] = None  # set when the section spans several pages
+
+
+def _words(text: str) -> List[str]:
+    # Tokens without any letter or digit (bullet glyphs, dot leaders) are
+    # often encoded differently between editions and carry no meaning.
+    return [w for w in text.split() if _WORD_RE.search(w)]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_words(text)).lower()
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.blake2b(_normalize(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def split_paragraphs(page_text: str) -> List[str]:
+    """
+    Split the text of one page into paragraphs.
+    pdfplumber rarely emits blank lines, so a line ending with sentence
+    punctuation also closes a paragraph.
+    """
+    paragraphs = []
+    current = []
+    for line in page_text.splitlines():
+        line = line.strip()
+        if not line:
+            if current:
+                paragraphs.append(" ".join(current))
+                current = []
+            continue
+        current.append(line)
+        if line.endswith(_SENTENCE_END):
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return paragraphs
+
+
+def _paragraph_units(pages: list, common_hashes: set) -> list:
+    """
+    Return (fingerprint, page_number, text) for every paragraph. A page found
+    in both versions becomes a single anchor unit with text None, so changes
+    on either side of it are never merged into one section.
+    """
+    units = []
+    for page_no, page_hash, page_text in pages:
+        if page_hash in common_hashes:
+            units.append((page_hash, page_no, None))
+            continue
+        for para in split_paragraphs(page_text):
+            units.append((_fingerprint(para), page_no, para))
+    return units
+
+
+def strip_running_lines(pages: List[str], min_share: float = 0.5) -> List[str]:
+    """
+    Remove running headers and footers (page numbers, version and date lines).
+    A line is considered running when, with its digits masked, it appears on
+    at least min_share of the pages, e.g. "Page 3 Version 1.0.12" or
+    "May 2025 Technical specifications AnaCredit".
+    """
+    def shape(line):
+        return _NON_SHAPE_RE.sub(" ", _DIGITS_RE.sub("#", line.lower())).strip()
+
+    counts = {}
+    if len(pages) >= 3:
+        for page in pages:
+            for key in {shape(l) for l in page.splitlines() if l.strip()}:
+                counts[key] = counts.get(key, 0) + 1
+    threshold = max(2, min_share * len(pages))
+
+    cleaned = []
+    for page in pages:
+        kept = [
+            l for l in page.splitlines()
+            if counts.get(shape(l), 0) < threshold and not _PAGE_NUMBER_RE.match(l.strip())
+        ]
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def _hashed_pages(pages: Iterable[str]) -> list:
+    """Consume pages once (they may come from a lazy generator) as (page_number, hash, text)."""
+    cleaned = strip_running_lines(list(pages))
+    return [(no, _fingerprint(text), text) for no, text in enumerate(cleaned, start=1)]
+
+
+def word_delta(old: str, new: str, context: int = 5) -> str:
+    """
+    Compact word-level delta in word-diff notation: removed words as [-...-],
+    added words as {+...+}, with a few words of context around each change.
+    """
+    a, b = _words(old), _words(new)
+    matcher = SequenceMatcher(a=a, b=b, autojunk=False)
+    hunks = []
+    for group in matcher.get_grouped_opcodes(context):
+        parts = []
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                parts.append(" ".join(a[i1:i2]))
+                continue
+            if i2 > i1:
+                parts.append("[-" + " ".join(a[i1:i2]) + "-]")
+            if j2 > j1:
+                parts.append("{+" + " ".join(b[j1:j2]) + "+}")
+        hunks.append(" ".join(p for p in parts if p))
+    return " ... ".join(hunks)
+
+
+def diff_pages(old_pages: Iterable[str], new_pages: Iterable[str]) -> List[ChangedSection]:
+    """
+    Page- then paragraph-level diff between two versions of a document.
+
+    Pages whose text is identical in both versions (even if they moved) are
+    reduced to one anchor each, so the paragraph diff only runs on pages
+    that changed. Paragraphs are compared by fingerprint, which keeps
+    SequenceMatcher cheap.
+    """
+    old_pages = _hashed_pages(old_pages)
+    new_pages = _hashed_pages(new_pages)
+    common = {h for _, h, _ in old_pages} & {h for _, h, _ in new_pages}
+
+    old_units = _paragraph_units(old_pages, common)
+    new_units = _paragraph_units(new_pages, common)
+
+    matcher = SequenceMatcher(
+        a=[u[0] for u in old_units],
+        b=[u[0] for u in new_units],
+        autojunk=False,
+    )
+
+    sections: List[ChangedSection] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        # Anchors of moved pages can land in a changed span; they carry no text
+        old_span = [u for u in old_units[i1:i2] if u[2] is not None]
+        new_span = [u for u in new_units[j1:j2] if u[2] is not None]
+        if not old_span and not new_span:
+            continue
+        old_text = "\n".join(u[2] for u in old_span)
+        new_text = "\n".join(u[2] for u in new_span)
+        units = new_span or old_span
+        first, last = units[0][1], units[-1][1]
+        last = last if last != first else None
+        if not old_span:
+            sections.append(ChangedSection("added", first, new_text, last))
+        elif not new_span:
+            sections.append(ChangedSection("removed", first, old_text, last))
+        else:
+            delta = word_delta(old_text, new_text)
+            if delta:
+                sections.append(ChangedSection("modified", first, delta, last))
+    return sections
+
+
+def render_changes(sections: Sequence[ChangedSection]) -> str:
+    """
+    Render changed sections as plain text for translation and analysis.
+    Modified sections are word deltas: [-removed-] and {+added+} words.
+    """
+    blocks = []
+    for s in sections:
+        pages = f"Pages {s.page}-{s.last_page}" if s.last_page else f"Page {s.page}"
+        blocks.append(f"[{pages} - {s.kind}]\n{s.text}")
+    return "\n\n".join(blocks)
@@ -0,0 +1,58 @@
+# app/utils/keyword_index.py
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def build_postings(text: str) -> Dict[str, List[int]]:
+    """Map every term of the text to the list of its token positions."""
+    postings: Dict[str, List[int]] = defaultdict(list)
+    for pos, term in enumerate(tokenize(text)):
+        postings[term].append(pos)
+    return dict(postings)
+
+
+def encode_positions(positions: List[int]) -> str:
+    return ",".join(map(str, positions))
+
+
+def decode_positions(raw: str) -> List[int]:
+    return [int(p) for p in raw.split(",")] if raw else []
+
+
+def count_phrase_hits(terms: List[str], postings: Dict[str, Dict[int, List[int]]]) -> Dict[int, int]:
+    """
+    Count occurrences of the phrase `terms` per document.
+
+    postings maps term -> {doc_id: positions}. A single term counts every
+    position; a multi-word phrase counts positions where all terms follow
+    each other.
+    """
+    if not terms or any(t not in postings for t in terms):
+        return {}
+
+    first = postings[terms[0]]
+    if len(terms) == 1:
+        return {doc_id: len(pos) for doc_id, pos in first.items()}
+
+    # Only documents containing every term can match
+    doc_ids = set(first)
+    for t in terms[1:]:
+        doc_ids &= postings[t].keys()
+
+    hits = {}
+    for doc_id in doc_ids:
+        following = [set(postings[t][doc_id]) for t in terms[1:]]
+        count = sum(
+            1 for p in first[doc_id]
+            if all(p + i in s for i, s in enumerate(following, start=1))
+        )
+        if count:
+            hits[doc_id] = count
+    return hits
@@ -1,11 +1,66 @@
 # app/utils/pdf_utils.py
 from pathlib import Path
+from typing import Iterator
 import pdfplumber
+from pdfplumber.utils import cluster_objects, extract_text
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    text_parts = []
+def iter_pdf_pages(pdf_path: Path) -> Iterator[str]:
+    """
+    Yield the text of each page lazily.
+
+    Each page's parsed layout is released (page.close()) once its text is
+    yielded, so memory stays flat however long the document is, and callers
+    can stop early or stream pages into a chunker.
+    """
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
-            t = page.extract_text() or ""
-            text_parts.append(t)
-    return "\n".join(text_parts)
+            try:
+                yield page.extract_text() or ""
+            finally:
+                page.close()
+
+def _is_struck(char: dict, strikes: list) -> bool:
+    """True if a thin horizontal line runs through the middle of the character."""
+    height = char["bottom"] - char["top"]
+    centre = (char["x0"] + char["x1"]) / 2
+    return any(
+        s["x0"] <= centre <= s["x1"]
+        and char["top"] + 0.3 * height <= (s["top"] + s["bottom"]) / 2 <= char["bottom"] - 0.1 * height
+        for s in strikes
+    )
+
+def _current_chars(page) -> list:
+    """
+    Characters of the page without struck-through text. Editions "with
+    revision marks" print the old and new values side by side, e.g. a struck
+    "11" next to an underlined "12", which would otherwise read "1.0.1112".
+    The characters after a struck one are moved left to close the gap.
+    """
+    strikes = [o for o in page.rects + page.lines if o["bottom"] - o["top"] <= 2]
+    if not strikes:
+        return page.chars
+    kept = []
+    for line in cluster_objects(page.chars, "top", 3):
+        shift = 0.0
+        for char in sorted(line, key=lambda c: c["x0"]):
+            if _is_struck(char, strikes):
+                shift += char["x1"] - char["x0"]
+            elif shift:
+                kept.append(dict(char, x0=char["x0"] - shift, x1=char["x1"] - shift))
+            else:
+                kept.append(char)
+    return kept
+
+def read_first_page(pdf_path: Path) -> str:
+    """
+    Text of the first page only, without struck-through revision marks;
+    the rest of the document is not parsed.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        if not pdf.pages:
+            return ""
+        page = pdf.pages[0]
+        try:
+            return extract_text(_current_chars(page))
+        finally:
+            page.close()
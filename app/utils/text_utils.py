@@ -0,0 +1,57 @@
+# app/utils/text_utils.py
+import hashlib
+from typing import Iterable, Iterator, List
+
+# Separates pre-built chunks in stored text (a form feed, as between PDF pages)
+CHUNK_SEPARATOR = "\f"
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def iter_chunks(parts: Iterable[str], max_chars: int) -> Iterator[str]:
+    """
+    Group consecutive text parts (pages, paragraphs, lines) into chunks of at
+    most max_chars characters. A part longer than max_chars is split on its
+    lines, and a single line longer than that is split hard.
+    """
+    current: List[str] = []
+    size = 0
+    for part in parts:
+        if len(part) > max_chars and "\n" in part:
+            if current:
+                yield "\n".join(current)
+                current, size = [], 0
+            yield from iter_chunks(part.splitlines(), max_chars)
+            continue
+        while len(part) > max_chars:
+            if current:
+                yield "\n".join(current)
+                current, size = [], 0
+            yield part[:max_chars]
+            part = part[max_chars:]
+        if current and size + len(part) + 1 > max_chars:
+            yield "\n".join(current)
+            current, size = [], 0
+        if part:
+            current.append(part)
+            size += len(part) + 1
+    if current:
+        yield "\n".join(current)
+
+
+def iter_parts(text: str, sep: str = CHUNK_SEPARATOR) -> Iterator[str]:
+    """Lazy text.split(sep): yields one part at a time without building the list."""
+    start = 0
+    while True:
+        end = text.find(sep, start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + len(sep)
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """Split text into chunks on line boundaries."""
+    return [c for c in iter_chunks(text.splitlines(), max_chars) if c.strip()]
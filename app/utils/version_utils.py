@@ -0,0 +1,56 @@
+# app/utils/version_utils.py
+import re
+from typing import Optional
+
+MONTHS = [
+    "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december",
+]
+
+_VERSION_RE = re.compile(r"\b(?:version|v)\s*(\d+(?:\.\d+)*)", re.IGNORECASE)
+_DATE_RE = re.compile(r"(" + "|".join(MONTHS) + r")\s*((?:19|20)\d{2})", re.IGNORECASE)
+
+def parse_version(text: str) -> Optional[str]:
+    """
+    First version label in the text, e.g. "AnaCredit – Version 1.0.13" -> "1.0.13".
+    Title pages with revision marks must be read without the struck-through
+    old version (see pdf_utils.read_first_page), or both labels run together.
+    """
+    m = _VERSION_RE.search(text or "")
+    return m.group(1) if m else None
+
+def parse_published(text: str) -> Optional[str]:
+    """
+    Latest "Month YYYY" date in the text as "YYYY-MM". Title pages with
+    revision marks show old and new dates side by side; the newest one wins.
+    """
+    dates = [
+        (int(year), MONTHS.index(month.lower()) + 1)
+        for month, year in _DATE_RE.findall(text or "")
+    ]
+    if not dates:
+        return None
+    year, month = max(dates)
+    return f"{year:04d}-{month:02d}"
+
+def parse_heading(first_page: str, max_lines: int = 6) -> str:
+    """
+    Title block of a document: the first lines of its first page, up to the
+    version or date line (the part of that line before the marker is kept).
+    """
+    lines = []
+    for line in (first_page or "").splitlines()[:max_lines]:
+        cut = min(
+            [m.start() for m in (_VERSION_RE.search(line), _DATE_RE.search(line)) if m],
+            default=None,
+        )
+        if cut is not None:
+            lines.append(line[:cut])
+            break
+        lines.append(line)
+    return " ".join(l.strip(" –-") for l in lines if l.strip(" –-"))
+
+def version_sort_key(version_label: Optional[str], published: Optional[str], doc_id: int) -> tuple:
+    """Order editions by version number, then publication date, then insertion order."""
+    version = tuple(int(p) for p in version_label.split(".")) if version_label else ()
+    return (version, published or "", doc_id)
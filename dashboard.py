@@ -2,7 +2,16 @@ from pathlib import Path
 import streamlit as st
 
 from app.db import init_db
-from app.models import get_recent_documents
+from app.models import (
+    get_recent_documents,
+    get_document_keywords,
+    get_known_keywords,
+    get_stage_counts,
+    get_dead_stages,
+    requeue_stages,
+)
+from app.agents.analyzer import DEFAULT_KEYWORDS, KeywordAnalysisAgent
+from app.agents.indexer import KeywordIndexAgent
 from app.agents.scheduler_agent import run_full_pipeline
 from app.utils.translation_utils import translate_keywords_gpt
 
@@ -16,10 +25,18 @@ def show_pipeline_progress():
             status.write(f"🟦 **Agent 1 – Extractor** starting for `{data['authority']}`…")
         elif event == "extract_done":
             status.write(f"✔ **Extractor finished** → {data['new']} new document(s)")
+        elif event == "parse_start":
+            status.write(f"⬜ **Parser** extracting PDF text…")
+        elif event == "parse_done":
+            status.write(f"✔ **Parser finished**")
         elif event == "translate_start":
             status.write(f"🟨 **Agent 2 – Translator** translating documents…")
         elif event == "translate_done":
             status.write(f"✔ **Translator finished**")
+        elif event == "index_start":
+            status.write(f"🟫 **Keyword index** evaluating keywords on the archive…")
+        elif event == "index_done":
+            status.write(f"✔ **Keyword index updated**")
         elif event == "analysis_start":
             status.write(f"🟧 **Agent 3 – Analysis** running keyword detection…")
         elif event == "analysis_done":
@@ -104,6 +121,18 @@ def main():
 
         status.update(label="Pipeline finished!", state="complete")
 
+    # Evaluate the current keyword set on every stored document, without LLM calls
+    if st.sidebar.button("🔎 Apply keywords to archive"):
+        with st.spinner("Evaluating keywords on the archive..."):
+            hits = KeywordIndexAgent().evaluate(DEFAULT_KEYWORDS + extra_keywords)
+        st.sidebar.success(f"{sum(len(v) for v in hits.values())} keyword match(es) stored")
+
+    # LLM keyword matching again; cached chunk summaries leave only the final reduce call per document
+    if st.sidebar.button("♻️ Re-analyse archive with these keywords"):
+        with st.spinner("Re-analysing documents..."):
+            stats = KeywordAnalysisAgent(extra_keywords).reanalyse()
+        st.sidebar.success(f"{stats['done']} document(s) re-analysed, {stats['failed'] + stats['dead']} failed")
+
     # Keep translations in session state
     if "translated_keywords" not in st.session_state:
         st.session_state["translated_keywords"] = {}
@@ -114,10 +143,10 @@ def main():
 
         with st.spinner(f"Translating keywords to '{target_language}'..."):
             for doc in docs:
-                if not doc["matched_keywords"]:
+                original_kw = [k["keyword"] for k in get_document_keywords(doc["id"]) if k["source"] == "llm"]
+                if not original_kw:
                     continue
 
-                original_kw = [k.strip() for k in doc["matched_keywords"].split(",") if k.strip()]
                 translated_kw = translate_keywords_gpt(original_kw, target_language)
 
                 st.session_state["translated_keywords"][doc["id"]] = translated_kw
@@ -129,7 +158,8 @@ def main():
     # MAIN CONTENT
     # --------------------------
     st.header("Recent Documents")
-    docs = get_recent_documents(limit=50)
+    keyword_filter = st.multiselect("Filter by keyword", options=get_known_keywords())
+    docs = get_recent_documents(limit=50, keywords=keyword_filter)
 
     if not docs:
         st.info("No documents yet. Run the pipeline at least once.")
@@ -141,7 +171,20 @@ def main():
             st.write(f"**File:** `{doc['file_path']}`")
             st.write(f"**Created at:** {doc['created_at']}")
             st.write(f"**Last updated:** {doc['updated_at']}")
-            st.write(f"**Matched keywords:** {doc['matched_keywords'] or 'None'}")
+            if doc["diff_text"] is not None:
+                st.write(f"**Previous version:** document #{doc['previous_version_id']} (only changes were analysed)")
+            elif doc["previous_version_id"]:
+                st.write(f"**Previous version:** document #{doc['previous_version_id']}")
+            doc_keywords = get_document_keywords(doc["id"])
+            matched = [k["keyword"] for k in doc_keywords if k["source"] == "llm"]
+            st.write(f"**Matched keywords:** {', '.join(matched) or 'None'}")
+
+            index_hits = [
+                f"{k['keyword']} ({k['hits']})"
+                for k in doc_keywords if k["source"] == "index"
+            ]
+            if index_hits:
+                st.write(f"**Keyword hits in text:** {', '.join(index_hits)}")
 
             # Show GPT translations
             if doc["id"] in st.session_state["translated_keywords"]:
@@ -152,6 +195,21 @@ def main():
                 st.markdown("**Summary:**")
                 st.write(doc["analysis_summary"])
 
+    # Pipeline queue state
+    if st.checkbox("Show pipeline queue", value=False):
+        for stage, counts in get_stage_counts().items():
+            st.write(f"**{stage}:** " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+        dead = get_dead_stages()
+        for row in dead:
+            st.error(
+                f"[{row['authority']}] {row['title']} (id={row['doc_id']}) stuck in "
+                f"'{row['stage']}' after {row['attempts']} attempt(s): {row['last_error']}"
+            )
+        if dead and st.button("🔁 Retry dead-lettered documents"):
+            # Picked up again by the next pipeline run or stage worker
+            requeue_stages()
+            st.rerun()
+
     # Logs toggle
     if st.checkbox("Show logs", value=False):
         show_logs()
@@ -1,9 +1,80 @@
 # main.py
+import argparse
+
 from app.db import init_db
 from app.agents.scheduler_agent import run_full_pipeline
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="RegulAI Watcher")
+    sub = parser.add_subparsers(dest="command")
+
+    worker = sub.add_parser("worker", help="Run stage workers as separate processes")
+    worker.add_argument("--extract", type=int, default=1, help="extraction processes (0 to disable)")
+    worker.add_argument("--parse", type=int, default=1, help="PDF parsing processes (CPU bound)")
+    worker.add_argument("--translate", type=int, default=2, help="translation processes (I/O bound)")
+    worker.add_argument("--analyse", type=int, default=2, help="analysis processes (I/O bound)")
+    worker.add_argument("--notify", type=int, default=1, help="notification processes")
+    worker.add_argument("--authorities", default="BCL", help="comma-separated authority codes to extract")
+    worker.add_argument("--language", default="en", help="target translation language")
+    worker.add_argument("--keywords", default="", help="extra keywords (comma-separated); also the first keyword set evaluated on the index")
+    worker.add_argument("--poll-seconds", type=float, default=10, help="idle wait between queue polls")
+    worker.add_argument("--extract-interval", type=float, default=3600, help="seconds between extraction runs")
+    worker.add_argument("--shutdown-timeout", type=float, default=30, help="seconds to wait for workers on stop")
+
+    backfill = sub.add_parser("backfill", help="Bulk import a historical archive")
+    backfill.add_argument("--authority", required=True, help="authority code (must be in AUTHORITIES)")
+    source = backfill.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="local directory of PDFs (searched recursively)")
+    source.add_argument("--manifest", help="file with one URL per line (optional tab + title)")
+    backfill.add_argument("--workers", type=int, default=8, help="parallel hashing/download threads")
+
+    requeue = sub.add_parser("requeue", help="Retry dead-lettered (or other) stage rows")
+    requeue.add_argument("--stage", choices=["parse", "translate", "analyse", "notify"], help="only this stage")
+    requeue.add_argument("--status", action="append", choices=["dead", "failed", "done"],
+                         help="statuses to reset (repeatable, default: dead); 'done' also clears "
+                              "the stage's output so it really runs again")
+    requeue.add_argument("--doc-id", type=int, action="append", help="only these documents (repeatable)")
+    return parser.parse_args()
+
+def split_list(value: str):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
 if __name__ == "__main__":
+    args = parse_args()
     # Initialize DB if needed
     init_db()
-    # Run a single full pass (you can call this from Streamlit too)
-    run_full_pipeline()
+
+    if args.command == "worker":
+        from app.agents.worker_pool import run_workers
+        run_workers(
+            counts={
+                "extract": args.extract,
+                "parse": args.parse,
+                "translate": args.translate,
+                "analyse": args.analyse,
+                "notify": args.notify,
+            },
+            options={
+                "authority_codes": split_list(args.authorities),
+                "target_language": args.language,
+                "extra_keywords": split_list(args.keywords),
+                "poll_seconds": args.poll_seconds,
+                "extract_interval": args.extract_interval,
+                "shutdown_timeout": args.shutdown_timeout,
+            },
+        )
+    elif args.command == "backfill":
+        from pathlib import Path
+        from app.agents.backfill import BackfillAgent
+        agent = BackfillAgent(args.authority, max_workers=args.workers)
+        if args.dir:
+            agent.ingest_directory(Path(args.dir))
+        else:
+            agent.ingest_manifest(Path(args.manifest))
+    elif args.command == "requeue":
+        from app.models import requeue_stages
+        count = requeue_stages(args.stage, tuple(args.status or ["dead"]), args.doc_id)
+        print(f"Requeued {count} stage row(s)")
+    else:
+        # Run a single full pass (you can call this from Streamlit too)
+        run_full_pipeline()
@@ -0,0 +1,16 @@
+import logging
+
+import pytest
+
+# Keep test runs out of logs/app.log: once the root logger has a handler,
+# setup_logging()'s basicConfig call is a no-op.
+logging.basicConfig(handlers=[logging.NullHandler()])
+
+import app.db  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.db, "DB_PATH", tmp_path / "metadata.db")
+    app.db.init_db()
+    return app.db
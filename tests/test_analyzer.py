@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app import models
+from app.agents import analyzer
+from app.config import CHUNK_MAX_CHARS
+
+
+class StubClient:
+    """Stands in for OpenAI: records prompts and answers map and reduce calls."""
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if "Merge them" in prompt:
+            data = {"summary": "Document summary", "matched_keywords": ["liquidity", "ESG", "unknown"]}
+        else:
+            data = {"summary": "Part summary", "topics": ["liquidity"]}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(data)))])
+
+    def calls(self):
+        reduce = sum("Merge them" in p for p in self.prompts)
+        return len(self.prompts) - reduce, reduce
+
+
+@pytest.fixture
+def client(monkeypatch):
+    stub = StubClient()
+    monkeypatch.setattr(analyzer, "OpenAI", lambda **_: stub)
+    return stub
+
+
+def translated_document(text):
+    doc_id = models.insert_document("BCL", "Circular", "https://example.org/c.pdf", "/tmp/c.pdf", "c")
+    models.update_document_source(doc_id, text)
+    models.update_document_translation(doc_id, text)
+    return doc_id
+
+
+def test_reanalyse_after_keyword_change_only_pays_for_reduce(db, client):
+    line = "Institutions shall hold a liquidity buffer. " * 20
+    doc_id = translated_document("\n".join([line] * (3 * CHUNK_MAX_CHARS // len(line))))
+
+    assert analyzer.KeywordAnalysisAgent().run()["done"] == 1
+    map_calls, reduce_calls = client.calls()
+    assert map_calls >= 3 and reduce_calls == 1
+    assert [k["keyword"] for k in models.get_document_keywords(doc_id)] == ["liquidity"]
+
+    client.prompts.clear()
+    assert analyzer.KeywordAnalysisAgent(["ESG"]).reanalyse()["done"] == 1
+    assert client.calls() == (0, 1)
+    assert "ESG" in client.prompts[0]
+    assert sorted(k["keyword"] for k in models.get_document_keywords(doc_id)) == ["ESG", "liquidity"]
+
+
+def test_run_skips_documents_already_analysed(db, client):
+    translated_document("Short text.")
+    analyzer.KeywordAnalysisAgent().run()
+    client.prompts.clear()
+    assert analyzer.KeywordAnalysisAgent(["ESG"]).run()["done"] == 0
+    assert client.prompts == []
@@ -0,0 +1,68 @@
+from app.utils.diff_utils import diff_pages, render_changes, strip_running_lines, word_delta
+
+
+def page(body, number):
+    return f"Technical specifications AnaCredit\n{body}\nPage {number} Version 1.0.{number}"
+
+
+def test_word_delta_marks_only_changed_words():
+    old = "Reporting agents shall report the data monthly to the central bank."
+    new = "Reporting agents shall report the data quarterly to the central bank."
+    assert word_delta(old, new) == "agents shall report the data [-monthly-] {+quarterly+} to the central bank."
+
+
+def test_word_delta_ignores_glyph_only_tokens():
+    assert word_delta(" first item", "• first item") == ""
+
+
+def test_word_delta_separates_distant_hunks():
+    words = [f"w{i}" for i in range(40)]
+    changed = list(words)
+    changed[2], changed[35] = "x2", "x35"
+    delta = word_delta(" ".join(words), " ".join(changed), context=2)
+    assert delta == "w0 w1 [-w2-] {+x2+} w3 w4 ... w33 w34 [-w35-] {+x35+} w36 w37"
+
+
+def test_strip_running_lines_removes_headers_and_page_numbers():
+    bodies = ["Scope of the report.", "Reporting agents.", "Transmission of data."]
+    pages = [page(body, i) for i, body in enumerate(bodies, start=1)]
+    assert strip_running_lines(pages) == bodies
+    # Too few pages to tell running lines from content
+    assert strip_running_lines(["Header\nBody."]) == ["Header\nBody."]
+
+
+def test_diff_pages_reports_added_removed_and_modified():
+    old = [
+        page("Unchanged introduction.", 1),
+        page("Amounts are reported in euro.\nObsolete paragraph.", 2),
+        page("Closing remarks.", 3),
+    ]
+    new = [
+        page("Unchanged introduction.", 1),
+        page("Amounts are reported in thousands of euro.", 2),
+        page("Closing remarks.", 3),
+        page("New annex.", 4),
+    ]
+    sections = diff_pages(iter(old), iter(new))
+
+    # The unchanged page 3 keeps the two changes apart
+    assert [(s.kind, s.page) for s in sections] == [("modified", 2), ("added", 4)]
+    assert sections[0].text == "Amounts are reported in {+thousands of+} euro. [-Obsolete paragraph.-]"
+    assert render_changes(sections) == (
+        "[Page 2 - modified]\nAmounts are reported in {+thousands of+} euro. [-Obsolete paragraph.-]\n\n"
+        "[Page 4 - added]\nNew annex."
+    )
+
+
+def test_diff_pages_ignores_moved_pages():
+    a, b, c = (page(body, 1) for body in ["Scope of the report.", "Reporting agents.", "Transmission of data."])
+    sections = diff_pages([a, b, c, "Annex one."], [a, c, b, "Annex two."])
+    assert [(s.kind, s.page, s.text) for s in sections] == [("modified", 4, "Annex [-one.-] {+two.+}")]
+
+
+def test_diff_pages_identical_editions():
+    bodies = ["Scope of the report.", "Reporting agents.", "Transmission of data."]
+    pages = [page(body, i) for i, body in enumerate(bodies, start=1)]
+    # Only the running header/footer (version number) differs
+    bumped = [p.replace("Version 1.0.", "Version 2.0.") for p in pages]
+    assert diff_pages(pages, bumped) == []
@@ -0,0 +1,22 @@
+from app import models
+from app.agents.indexer import KeywordIndexAgent
+
+
+def translated_document(title, text):
+    doc_id = models.insert_document("BCL", title, f"https://example.org/{title}", f"/tmp/{title}.pdf", title)
+    models.update_document_translation(doc_id, text)
+    return doc_id
+
+
+def test_evaluate_without_keywords_refreshes_the_last_set(db):
+    agent = KeywordIndexAgent()
+    assert agent.evaluate() == {}  # nothing applied yet
+
+    first = translated_document("a", "Own funds requirements apply to credit institutions.")
+    assert agent.evaluate(["own funds", "liquidity"]) == {"own funds": {first: 1}, "liquidity": {}}
+    assert models.get_index_keywords() == ["own funds", "liquidity"]
+
+    # A newly translated document is matched against the same keyword set
+    second = translated_document("b", "Liquidity coverage and own funds.")
+    assert agent.evaluate() == {"own funds": {first: 1, second: 1}, "liquidity": {second: 1}}
+    assert models.get_known_keywords() == ["liquidity", "own funds"]
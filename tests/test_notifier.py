@@ -0,0 +1,65 @@
+import pytest
+
+from app import models
+from app.agents import notifier
+
+
+def skip_backoff(db):
+    conn = db.get_connection()
+    conn.execute("UPDATE document_stages SET next_attempt_at=''")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def analysed(db):
+    doc_id = models.insert_document("BCL", "Circular", "https://example.org/c.pdf", "/tmp/c.pdf", "c")
+    models.update_document_source(doc_id, "text")
+    models.update_document_translation(doc_id, "text")
+    models.update_document_analysis(doc_id, "summary", ["liquidity"])
+    return doc_id
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = notifier.NotificationAgent()
+    agent.sent = []
+    monkeypatch.setattr(agent, "send_email", lambda subject, body: agent.sent.append(subject))
+    return agent
+
+
+def test_refused_email_is_retried(db, analysed, agent, monkeypatch):
+    def refuse(subject, body):
+        raise ConnectionRefusedError("SMTP down")
+
+    monkeypatch.setattr(agent, "send_email", refuse)
+    assert agent.run()["failed"] == 1
+    assert models.get_document(analysed)["notify_started_at"] is None
+
+    skip_backoff(db)
+    monkeypatch.setattr(agent, "send_email", lambda subject, body: agent.sent.append(subject))
+    assert agent.run()["done"] == 1
+    assert len(agent.sent) == 1 and models.get_document(analysed)["last_notified_at"] is not None
+
+
+def test_crash_after_sending_does_not_send_twice(db, analysed, agent, monkeypatch):
+    def crash(doc_id):
+        raise SystemError("worker died before recording the email")
+
+    monkeypatch.setattr(notifier, "mark_document_notified", crash)
+    agent.run()
+    assert len(agent.sent) == 1
+    monkeypatch.setattr(notifier, "mark_document_notified", models.mark_document_notified)
+
+    skip_backoff(db)
+    assert agent.run()["failed"] == 1
+    assert len(agent.sent) == 1  # not re-sent automatically
+    conn = db.get_connection()
+    error = conn.execute("SELECT last_error FROM document_stages WHERE stage='notify'").fetchone()[0]
+    conn.close()
+    assert "interrupted while sending" in error
+
+    # An operator requeue is the go-ahead to send again
+    models.requeue_stages("notify", ("failed", "dead"))
+    assert agent.run()["done"] == 1
+    assert len(agent.sent) == 2
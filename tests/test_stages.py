@@ -0,0 +1,229 @@
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.agents import stages
+
+MAX_ATTEMPTS = 3
+LEASE = 60
+
+
+def add_document(title="Technical specifications", link=True):
+    doc_id = models.insert_document("BCL", title, f"https://example.org/{title}.pdf", f"/tmp/{title}.pdf", title)
+    if link:
+        models.update_document_identities(
+            [{"id": doc_id, "title": title, "heading": title, "version_label": None, "published": None}]
+        )
+        models.link_document_versions("BCL")
+    return doc_id
+
+
+def stage_row(db, doc_id, stage="translate"):
+    conn = db.get_connection()
+    row = conn.execute(
+        "SELECT * FROM document_stages WHERE doc_id=? AND stage=?", (doc_id, stage)
+    ).fetchone()
+    conn.close()
+    return row
+
+
+def skip_backoff(db, doc_id):
+    conn = db.get_connection()
+    conn.execute("UPDATE document_stages SET next_attempt_at='' WHERE doc_id=?", (doc_id,))
+    conn.commit()
+    conn.close()
+
+
+def claim(worker, limit=10, lease=LEASE):
+    return models.claim_stage_documents("parse", worker, limit, lease, MAX_ATTEMPTS)
+
+
+def test_enqueue_is_idempotent(db):
+    add_document()
+    assert models.enqueue_ready_stages("parse") == 1
+    assert models.enqueue_ready_stages("parse") == 0
+
+
+def test_unlinked_documents_are_not_parsed(db):
+    doc_id = add_document(link=False)
+    assert models.enqueue_ready_stages("parse") == 0
+
+    # Identified but not linked yet: still not ready
+    models.update_document_identities(
+        [{"id": doc_id, "title": "t", "heading": "", "version_label": None, "published": None}]
+    )
+    assert models.enqueue_ready_stages("parse") == 0
+
+    models.link_document_versions("BCL")
+    assert models.enqueue_ready_stages("parse") == 1
+
+
+def test_claimed_rows_are_not_claimed_twice(db):
+    doc_ids = [add_document(f"doc{i}") for i in range(3)]
+    models.enqueue_ready_stages("parse")
+
+    first = claim("w1", limit=2)
+    second = claim("w2")
+    assert len(first) == 2
+    assert [r["id"] for r in second] == [doc_ids[2]]
+    assert claim("w3") == []
+
+
+def test_failure_backs_off_then_dead_letters(db):
+    doc_id = add_document()
+    models.enqueue_ready_stages("parse")
+
+    claim("w1")
+    assert models.fail_stage(doc_id, "parse", "w1", "boom", MAX_ATTEMPTS, 30) == "failed"
+    row = stage_row(db, doc_id, "parse")
+    assert row["attempts"] == 1 and row["last_error"] == "boom"
+    assert row["next_attempt_at"] > models.now_iso()
+    assert claim("w1") == []  # still backing off
+
+    for _ in range(MAX_ATTEMPTS - 1):
+        skip_backoff(db, doc_id)
+        assert len(claim("w1")) == 1
+        status = models.fail_stage(doc_id, "parse", "w1", "boom", MAX_ATTEMPTS, 30)
+    assert status == "dead"
+    skip_backoff(db, doc_id)
+    assert claim("w1") == []
+
+
+def test_backoff_doubles(db):
+    doc_id = add_document()
+    models.enqueue_ready_stages("parse")
+    waits = []
+    for _ in range(2):
+        skip_backoff(db, doc_id)
+        claim("w1")
+        before = datetime.utcnow()
+        models.fail_stage(doc_id, "parse", "w1", "boom", MAX_ATTEMPTS, 100)
+        retry_at = datetime.fromisoformat(stage_row(db, doc_id, "parse")["next_attempt_at"])
+        waits.append((retry_at - before).total_seconds())
+    assert waits[0] == pytest.approx(100, abs=5)
+    assert waits[1] == pytest.approx(200, abs=5)
+
+
+def test_expired_lease_is_reclaimed_and_counts_as_attempt(db):
+    doc_id = add_document()
+    models.enqueue_ready_stages("parse")
+
+    assert len(claim("crashed", lease=-1)) == 1
+    assert [r["id"] for r in claim("w2")] == [doc_id]
+    row = stage_row(db, doc_id, "parse")
+    assert row["lease_owner"] == "w2" and row["attempts"] == 2
+
+    # The crashed worker can neither complete nor fail the row any more
+    assert models.complete_stage(doc_id, "parse", "crashed") is False
+    assert models.fail_stage(doc_id, "parse", "crashed", "late", MAX_ATTEMPTS, 0) == "lost"
+    assert models.complete_stage(doc_id, "parse", "w2") is True
+
+
+def test_expired_lease_after_last_attempt_goes_dead(db):
+    doc_id = add_document()
+    models.enqueue_ready_stages("parse")
+    for _ in range(MAX_ATTEMPTS):
+        claim("crashed", lease=-1)
+    assert claim("w2") == []
+    assert stage_row(db, doc_id, "parse")["status"] == "dead"
+
+
+def test_renew_extends_only_own_lease(db):
+    doc_id = add_document()
+    models.enqueue_ready_stages("parse")
+    claim("w1", lease=-1)
+
+    assert models.renew_lease(doc_id, "parse", "w2", LEASE) is False
+    assert models.renew_lease(doc_id, "parse", "w1", LEASE) is True
+    assert claim("w2") == []  # no longer expired
+
+
+def test_requeue_dead_rows(db):
+    doc_id = add_document()
+    models.enqueue_ready_stages("parse")
+    for _ in range(MAX_ATTEMPTS):
+        claim("crashed", lease=-1)
+    claim("w2")
+
+    assert models.requeue_stages("notify") == 0
+    assert models.requeue_stages("parse") == 1
+    row = stage_row(db, doc_id, "parse")
+    assert row["status"] == "pending" and row["attempts"] == 0 and row["last_error"] is None
+    assert [r["id"] for r in claim("w3")] == [doc_id]
+
+
+def test_process_stage_isolates_failures(db, monkeypatch):
+    monkeypatch.setattr(stages, "PIPELINE_BACKOFF_SECONDS", 3600)
+    ok_id, bad_id = add_document("ok"), add_document("bad")
+
+    def handler(doc, lease):
+        if doc["id"] == bad_id:
+            raise ValueError("poison")
+        models.update_document_source(doc["id"], "text")
+
+    assert stages.process_stage("parse", handler, "w1") == {"done": 1, "failed": 1, "dead": 0}
+    assert stage_row(db, ok_id, "parse")["status"] == "done"
+    assert stage_row(db, bad_id, "parse")["last_error"] == "ValueError: poison"
+    # A restart does not redo the finished document nor retry before the backoff
+    assert stages.process_stage("parse", handler, "w1") == {"done": 0, "failed": 0, "dead": 0}
+
+
+def test_process_stage_stops_on_lost_lease(db):
+    doc_id = add_document()
+
+    def handler(doc, lease):
+        conn = db.get_connection()
+        conn.execute("UPDATE document_stages SET lease_owner='other' WHERE doc_id=?", (doc["id"],))
+        conn.commit()
+        conn.close()
+        lease.renew()
+        raise AssertionError("work continued after the lease was lost")
+
+    assert stages.process_stage("parse", handler, "w1") == {"done": 0, "failed": 0, "dead": 0}
+    row = stage_row(db, doc_id, "parse")
+    assert row["lease_owner"] == "other" and row["status"] == "running"
+
+
+def run_stage(stage, doc_id, work):
+    models.enqueue_ready_stages(stage)
+    assert [r["id"] for r in models.claim_stage_documents(stage, "w1", 10, LEASE, MAX_ATTEMPTS)] == [doc_id]
+    work()
+    assert models.complete_stage(doc_id, stage, "w1")
+
+
+def claim_stage(stage):
+    models.enqueue_ready_stages(stage)
+    return models.claim_stage_documents(stage, "w2", 10, LEASE, MAX_ATTEMPTS)
+
+
+def processed_document():
+    doc_id = add_document()
+    run_stage("parse", doc_id, lambda: models.update_document_source(doc_id, "text"))
+    run_stage("translate", doc_id, lambda: models.update_document_translation(doc_id, "translated"))
+    run_stage("analyse", doc_id, lambda: models.update_document_analysis(doc_id, "summary", ["capital"]))
+    run_stage("notify", doc_id, lambda: models.mark_document_notified(doc_id))
+    return doc_id
+
+
+def test_requeue_done_clears_the_stage_output(db):
+    doc_id = processed_document()
+
+    assert models.requeue_stages("analyse", ("done",)) == 1
+    doc = models.get_document(doc_id)
+    assert doc["analysis_summary"] is None and doc["translated_text"] == "translated"
+    assert models.get_document_keywords(doc_id) == []
+    assert doc["last_notified_at"] is not None  # not emailed again
+    assert [r["id"] for r in claim_stage("analyse")] == [doc_id]
+    assert claim_stage("notify") == []
+
+
+def test_requeue_done_translation_also_resets_analysis(db):
+    doc_id = processed_document()
+
+    assert models.requeue_stages("translate", ("done",)) == 1
+    doc = models.get_document(doc_id)
+    assert doc["translated_text"] is None and doc["analysis_summary"] is None
+    assert stage_row(db, doc_id, "analyse") is None
+    assert stage_row(db, doc_id, "parse")["status"] == "done"
+    assert [r["id"] for r in claim_stage("translate")] == [doc_id]
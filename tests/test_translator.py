@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import models
+from app.agents import stages, translator
+from app.config import CHUNK_MAX_CHARS
+from app.utils.text_utils import CHUNK_SEPARATOR
+
+
+class StubClient:
+    """Stands in for OpenAI: upper-cases the text, or fails on the chunk starting with fail_on."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        text = messages[-1]["content"]
+        self.calls.append(" ".join(text.split()[:2]))  # e.g. "page 3"
+        if self.fail_on and text.startswith(self.fail_on):
+            raise ConnectionError("API unavailable")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text.upper()))])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    stub = StubClient()
+    monkeypatch.setattr(translator, "OpenAI", lambda **_: stub)
+    # One chunk at a time, so the chunks done before a failure are predictable
+    monkeypatch.setattr(translator, "LLM_MAX_WORKERS", 1)
+    return stub
+
+
+def test_retry_only_translates_the_missing_chunks(db, client):
+    # Parts this long are never packed into one chunk
+    chunks = [f"page {i} " + "x" * (CHUNK_MAX_CHARS - 20) for i in range(5)]
+    agent = translator.TranslationAgent("fr")
+
+    client.fail_on = "page 2"
+    with pytest.raises(ConnectionError):
+        agent.translate_text(CHUNK_SEPARATOR.join(chunks))
+    first = list(client.calls)
+    # The next chunk may already have started when the failure surfaced
+    assert first[:3] == ["page 0", "page 1", "page 2"] and len(first) <= 4
+
+    client.calls.clear()
+    client.fail_on = None
+    assert agent.translate_text(CHUNK_SEPARATOR.join(chunks)) == "\n\n".join(c.upper() for c in chunks)
+    assert client.calls == ["page 2"] + [f"page {i}" for i in range(len(first), 5)]
+
+    # Another target language is a different cache entry
+    client.calls.clear()
+    translator.TranslationAgent("de").translate_text(chunks[0])
+    assert client.calls == ["page 0"]
+
+
+def test_empty_source_text_is_dead_lettered(db, client, monkeypatch):
+    monkeypatch.setattr(stages, "PIPELINE_MAX_ATTEMPTS", 1)
+    doc_id = models.insert_document("BCL", "Scan", "https://example.org/scan.pdf", "/tmp/scan.pdf", "scan")
+    models.update_document_source(doc_id, "")
+
+    assert translator.TranslationAgent("fr").run() == {"done": 0, "failed": 0, "dead": 1}
+    assert [r["doc_id"] for r in models.get_dead_stages()] == [doc_id]
+    assert client.calls == []
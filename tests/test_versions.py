@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import pytest
+
+from app import models
+from app.agents.extractor import ExtractionAgent
+from app.utils.version_utils import parse_heading, parse_published, parse_version, version_sort_key
+
+SAMPLES = Path(__file__).resolve().parent.parent / "data" / "documents" / "BCL"
+
+
+def test_parse_version():
+    assert parse_version("Technical specifications\nAnaCredit – Version 1.0.13\n") == "1.0.13"
+    assert parse_version("Report AnaCredit\nVersion 4.6\nOctober 2025") == "4.6"
+    assert parse_version("v2 draft") == "2"
+    assert parse_version("version with revision marks") is None
+    assert parse_version("") is None
+
+
+def test_parse_published_keeps_newest_date():
+    assert parse_published("Version 2.5\nNovember 2025") == "2025-11"
+    assert parse_published("November 2023June 2025") == "2025-06"
+    assert parse_published("no date here") is None
+
+
+def test_parse_heading_stops_at_version_line():
+    page = "Technical specifications\nAnaCredit – Version 1.0.13\nBanque centrale du Luxembourg"
+    assert parse_heading(page) == "Technical specifications AnaCredit"
+
+
+def test_version_sort_key_compares_numerically():
+    labels = ["1.0.10", "1.0.9", "1.0.13", "1.0.7"]
+    ordered = sorted(labels, key=lambda v: version_sort_key(v, None, 0))
+    assert ordered == ["1.0.7", "1.0.9", "1.0.10", "1.0.13"]
+    # Without a version label, the publication date decides
+    assert version_sort_key(None, "2025-06", 1) > version_sort_key(None, "2023-11", 2)
+
+
+def insert(title, version_label=None, published=None, heading="Technical specifications AnaCredit"):
+    models.insert_documents([{
+        "authority": "BCL", "title": title, "url": f"https://example.org/{title}/{version_label}",
+        "file_path": f"/tmp/{title}-{version_label}.pdf", "content_hash": f"{title}-{version_label}-{published}",
+        "heading": heading, "version_label": version_label, "published": published,
+    }])
+
+
+def chain(head_title):
+    conn = models.get_connection()
+    rows = {r["id"]: r for r in conn.execute("SELECT * FROM documents")}
+    conn.close()
+    linked = {r["previous_version_id"] for r in rows.values()}
+    head = next(r for r in rows.values() if r["title"] == head_title and r["id"] not in linked)
+    labels = []
+    while head is not None:
+        labels.append(head["version_label"] or head["published"])
+        head = rows.get(head["previous_version_id"])
+    return labels[::-1]
+
+
+def test_link_document_versions_orders_by_version_not_insertion(db):
+    for label in ["1.0.13", "1.0.9", "1.0.10", "1.0.7"]:
+        insert("Technical specifications", label)
+    insert("Instructions", "4.6", heading="Report AnaCredit Reporting instructions")
+
+    assert models.link_document_versions("BCL") == 3
+    assert chain("Technical specifications") == ["1.0.7", "1.0.9", "1.0.10", "1.0.13"]
+    assert chain("Instructions") == ["4.6"]
+    assert models.link_document_versions("BCL") == 0
+
+
+def test_link_document_versions_falls_back_to_date(db):
+    insert("List of reporting Member States", published="2025-10", heading="AnaCredit List")
+    insert("List of reporting Member States", published="2022-09", heading="AnaCredit List")
+    models.link_document_versions("BCL")
+    assert chain("List of reporting Member States") == ["2022-09", "2025-10"]
+
+
+@pytest.mark.skipif(not SAMPLES.exists(), reason="sample PDFs not available")
+def test_revision_mark_editions_are_ordered(db):
+    agent = ExtractionAgent("BCL")
+    versions = []
+    for path in SAMPLES.glob("*_version with revision marks.pdf"):
+        identity = agent.identify(path)
+        if identity["heading"] == "Technical specifications AnaCredit":
+            versions.append(identity["version_label"])
+            insert("version with revision marks", identity["version_label"], identity["published"])
+    models.link_document_versions("BCL")
+
+    assert sorted(versions) == sorted(f"1.0.{n}" for n in range(7, 14))
+    assert chain("version with revision marks") == [f"1.0.{n}" for n in range(7, 14)]
+
+
+def test_relinking_resets_documents_parsed_against_the_old_link(db):
+    insert("Technical specifications", "1.0.11")
+    insert("Technical specifications", "1.0.13")
+    models.link_document_versions("BCL")
+    models.enqueue_ready_stages("parse")
+    older, newer = 1, 2
+    for doc_id in (older, newer):
+        models.update_document_source(doc_id, "text", "diff" if doc_id == newer else None)
+        models.update_document_translation(doc_id, "translated")
+        models.save_document_postings(doc_id, {"text": "0"})
+
+    # The edition in between is backfilled later
+    insert("Technical specifications", "1.0.12")
+    assert models.link_document_versions("BCL") == 2  # 1.0.12 -> 1.0.11 and 1.0.13 -> 1.0.12
+
+    newer_doc, older_doc = models.get_document(newer), models.get_document(older)
+    assert newer_doc["previous_version_id"] == 3
+    assert newer_doc["source_text"] is None and newer_doc["diff_text"] is None
+    assert newer_doc["translated_text"] is None
+    assert list(models.get_term_postings(["text"])["text"]) == [older]
+    assert older_doc["source_text"] == "text" and older_doc["translated_text"] == "translated"
+    assert models.enqueue_ready_stages("parse") == 2  # the reset edition and the new one